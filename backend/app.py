@@ -1,14 +1,27 @@
-from flask import Flask, request, jsonify, render_template, send_from_directory
+from flask import Flask, Response, request, jsonify, render_template, send_file, send_from_directory, abort, stream_with_context
+from werkzeug.security import safe_join
 from flask_cors import CORS
+from sqlalchemy.orm import defer, joinedload
 import os
 import json
+import queue
+import hashlib
 import datetime
 import logging
-from models import db, Topic, Schedule, Status, Log
-from perplexity_api import PerplexityAPIManager
+import click
+from models import (db, Topic, Schedule, Status, Log, JournalEntry, Run,
+                    sqlite_engine_options, apply_sqlite_pragmas, upgrade_schema)
+from perplexity_api import PerplexityAPIManager, PERPLEXITY_BASE_URL
+from response_cache import ResponseCache
+from ledger import UsageLedger
+from snapshot import Snapshot
+from events import EventBus
+from metrics import REGISTRY, CONTENT_TYPE
 from scheduler import SchedulerManager
-from journal_generator import generate_journal_entry
+from journal_generator import generate_journal_entry, configure_renderer, read_content_hash
 from config import Config
+from utils import (encode_cursor, decode_cursor, get_journal_stats, rebuild_journal_index,
+                   read_topic_settings, parse_topic_document, import_topics, export_topics)
 
 # Configure logging
 logging.basicConfig(
@@ -30,14 +43,77 @@ CORS(app)  # Enable Cross-Origin Resource Sharing
 # Load configuration
 app.config.from_object(Config)
 
-# Initialize database
+# Initialize database with a pool sized for the request, scheduler and job threads
+database_timeout = app.config.get('DATABASE_BUSY_TIMEOUT', 30.0)
+engine_options = sqlite_engine_options(
+    app.config.get('SQLALCHEMY_DATABASE_URI', ''),
+    pool_size=app.config.get('DATABASE_POOL_SIZE',
+                             app.config.get('SCHEDULER_MAX_WORKERS', 4) + app.config.get('RUN_NOW_WORKERS', 2) + 4),
+    busy_timeout=database_timeout
+)
+engine_options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options
 db.init_app(app)
+with app.app_context():
+    apply_sqlite_pragmas(
+        db.engine,
+        busy_timeout=database_timeout,
+        synchronous=app.config.get('DATABASE_SYNCHRONOUS', 'NORMAL')
+    )
+
+# Initialize the optional response cache
+response_cache = None
+if app.config.get('PERPLEXITY_CACHE_PATH'):
+    response_cache = ResponseCache(
+        app.config['PERPLEXITY_CACHE_PATH'],
+        ttl=app.config.get('PERPLEXITY_CACHE_TTL', 86400),
+        max_bytes=app.config.get('PERPLEXITY_CACHE_MAX_BYTES', 50 * 1024 * 1024)
+    )
+
+# Usage counters shared by all worker processes
+usage_ledger = UsageLedger(
+    app.config.get('USAGE_LEDGER_PATH', 'usage_ledger.db'),
+    flush_interval=app.config.get('USAGE_LEDGER_FLUSH_INTERVAL', 2.0)
+)
 
 # Initialize API manager
-api_manager = PerplexityAPIManager(app.config['PERPLEXITY_API_KEY'], app.config['DAILY_BUDGET'])
+api_manager = PerplexityAPIManager(
+    app.config['PERPLEXITY_API_KEY'],
+    app.config['DAILY_BUDGET'],
+    pool_size=app.config.get('PERPLEXITY_POOL_SIZE', 10),
+    connect_timeout=app.config.get('PERPLEXITY_CONNECT_TIMEOUT', 5.0),
+    read_timeout=app.config.get('PERPLEXITY_READ_TIMEOUT', 30.0),
+    cache=response_cache,
+    requests_per_minute=app.config.get('PERPLEXITY_REQUESTS_PER_MINUTE', 50),
+    burst=app.config.get('PERPLEXITY_BURST', 5),
+    pricing=app.config.get('PERPLEXITY_PRICING'),
+    ledger=usage_ledger,
+    base_url=app.config.get('PERPLEXITY_BASE_URL', PERPLEXITY_BASE_URL)
+)
+
+# Initialize the journal render engine
+configure_renderer(bytecode_cache_dir=app.config.get('JOURNAL_BYTECODE_CACHE_DIR'))
+
+# Live progress events for the /api/events stream
+event_bus = EventBus(
+    max_queue=app.config.get('EVENT_QUEUE_SIZE', 100),
+    heartbeat=app.config.get('EVENT_HEARTBEAT_INTERVAL', 15.0)
+)
+event_bus.publish_inserts(Log, 'log')
 
 # Initialize scheduler manager
-scheduler_manager = SchedulerManager(api_manager, generate_journal_entry)
+scheduler_manager = SchedulerManager(
+    api_manager,
+    generate_journal_entry,
+    max_workers=app.config.get('SCHEDULER_MAX_WORKERS', 4),
+    event_bus=event_bus,
+    manual_workers=app.config.get('RUN_NOW_WORKERS', 2),
+    manual_queue_size=app.config.get('RUN_NOW_QUEUE_SIZE', 20),
+    spread_window=app.config.get('SCHEDULE_SPREAD_WINDOW', 3600),
+    stream_responses=app.config.get('PERPLEXITY_STREAMING', True),
+    delta_max_bytes=app.config.get('DELTA_MAX_BYTES', 65536),
+    sync_interval=app.config.get('SCHEDULE_SYNC_INTERVAL', 300)
+)
 
 @app.before_first_request
 def initialize_database():
@@ -45,6 +121,11 @@ def initialize_database():
     with app.app_context():
         db.create_all()
         
+        # Databases created by older versions lack the newer columns
+        added = upgrade_schema(db.engine)
+        if added:
+            logger.info(f"Added database columns: {', '.join(added)}")
+        
         # Check if Status table is empty and initialize it
         if Status.query.count() == 0:
             status = Status(
@@ -77,50 +158,248 @@ def index():
     """Serve the main application page"""
     return render_template('index.html')
 
+# Precompressed journal variants, in order of preference
+JOURNAL_ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+# Content hashes of served journal files, keyed by path and checked against the file's stat
+journal_etags = {}
+
+def journal_content_hash(filepath, stat):
+    """Get the content hash of a journal file, reading it only when the file changed"""
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = journal_etags.get(filepath)
+    if cached and cached[0] == key:
+        return cached[1]
+    
+    content_hash = read_content_hash(filepath)
+    if content_hash is None:
+        # Entries written before content hashes were recorded
+        with open(filepath, 'rb') as f:
+            content_hash = hashlib.sha256(f.read()).hexdigest()
+    
+    journal_etags[filepath] = (key, content_hash)
+    return content_hash
+
 @app.route('/journal/<path:filename>')
 def journal_entry(filename):
-    """Serve generated journal entries"""
-    return send_from_directory('../frontend/journal_html', filename)
+    """Serve generated journal entries
+    
+    Serves a precompressed variant when the client accepts one, with a strong
+    ETag derived from the entry's content hash so that revalidation requests
+    are answered with 304 Not Modified. Links that carry the current hash as
+    ?v=<hash> are content-addressed and may be cached for a year. Other
+    files, such as the compressed variants themselves, are served as is.
+    """
+    if not filename.endswith('.html'):
+        return send_from_directory('../frontend/journal_html', filename)
+    
+    journal_dir = os.path.join(app.root_path, '..', 'frontend', 'journal_html')
+    filepath = safe_join(journal_dir, filename)
+    if filepath is None or not os.path.isfile(filepath):
+        abort(404)
+    
+    content_hash = journal_content_hash(filepath, os.stat(filepath))
+    
+    served_path, encoding, etag = filepath, None, content_hash
+    for candidate, extension in JOURNAL_ENCODINGS:
+        if request.accept_encodings[candidate] and os.path.isfile(filepath + extension):
+            served_path, encoding = filepath + extension, candidate
+            etag = f"{content_hash}-{extension[1:]}"
+            break
+    
+    if request.args.get('v') == content_hash:
+        max_age = 31536000
+    else:
+        max_age = app.config.get('JOURNAL_CACHE_MAX_AGE', 0)
+    
+    response = send_file(
+        served_path,
+        mimetype='text/html',
+        etag=etag,
+        conditional=True,
+        max_age=max_age
+    )
+    response.vary.add('Accept-Encoding')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if max_age == 31536000:
+        response.cache_control.immutable = True
+    elif not max_age:
+        response.cache_control.no_cache = True
+    return response
 
 # API endpoints
+# Fields of Topic.to_dict that can be selected with ?fields=
+TOPIC_FIELDS = (
+    'id', 'name', 'query', 'tags', 'created_at', 'last_updated', 'status',
+    'average_cost', 'frequency', 'cron', 'refresh_mode'
+)
+
+def topics_version():
+    """Get a value that changes whenever any topic is added, changed or deleted"""
+    count, modified = db.session.query(db.func.count(Topic.id), db.func.max(Topic.modified_at)).one()
+    return f"{count}:{modified.isoformat() if modified else ''}"
+
 @app.route('/api/topics', methods=['GET'])
 def get_topics():
-    """Get all research topics"""
-    topics = Topic.query.all()
-    return jsonify([topic.to_dict() for topic in topics])
+    """Get a page of research topics ordered by ID
+    
+    Query parameters:
+        status: Only topics with this status
+        tag: Only topics with this tag
+        name: Only topics whose name starts with this prefix
+        fields: Comma-separated fields to return (default all; id is always included)
+        limit: Page size, at most 500 (default 100)
+        cursor: Value of the X-Next-Cursor header of the previous page
+    
+    Responses carry an ETag derived from the topic collection's version and
+    the query, so unchanged pages are answered with 304.
+    """
+    limit = max(1, min(request.args.get('limit', 100, type=int), 500))
+    
+    fields = TOPIC_FIELDS
+    if request.args.get('fields'):
+        fields = ['id'] + [field for field in request.args['fields'].split(',') if field != 'id']
+        if any(field not in TOPIC_FIELDS for field in fields):
+            return jsonify({"error": "Invalid fields"}), 400
+    
+    # Check the collection version before loading any topics
+    etag = hashlib.sha256(
+        f"{topics_version()}?{request.query_string.decode('utf-8')}".encode('utf-8')
+    ).hexdigest()[:32]
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    
+    query = db.session.query(Topic)
+    if request.args.get('status'):
+        query = query.filter(Topic.status == request.args['status'])
+    if request.args.get('tag'):
+        # Tags are stored comma-separated
+        tags = db.literal(',') + Topic.tags + ','
+        query = query.filter(tags.contains(f",{request.args['tag']},", autoescape=True))
+    if request.args.get('name'):
+        query = query.filter(Topic.name.startswith(request.args['name'], autoescape=True))
+    
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            (last_id,) = decode_cursor(cursor)
+        except (ValueError, TypeError):
+            return jsonify({"error": "Invalid cursor"}), 400
+        query = query.filter(Topic.id > last_id)
+    
+    # Fetch one extra row to know whether there is a next page
+    topics = query.order_by(Topic.id.asc()).limit(limit + 1).all()
+    response = jsonify([
+        {field: data[field] for field in fields}
+        for data in (topic.to_dict() for topic in topics[:limit])
+    ])
+    
+    if len(topics) > limit:
+        response.headers['X-Next-Cursor'] = encode_cursor([topics[limit - 1].id])
+    
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @app.route('/api/topics', methods=['POST'])
 def add_topic():
     """Add a new research topic"""
     data = request.json
+    try:
+        frequency, cron, refresh_mode = read_topic_settings(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
     topic = Topic(
         name=data['name'],
         query=data['query'],
+        frequency=frequency,
+        cron=cron,
+        refresh_mode=refresh_mode,
         created_at=datetime.datetime.now()
     )
     db.session.add(topic)
     db.session.commit()
+    scheduler_manager.schedule_topic(app, topic)
     logger.info(f"Added new topic: {data['name']}")
     return jsonify(topic.to_dict()), 201
 
+# Content types read as YAML by the bulk topic import
+YAML_CONTENT_TYPES = ('application/yaml', 'application/x-yaml', 'text/yaml', 'text/x-yaml')
+
+@app.route('/api/topics/bulk', methods=['POST'])
+def bulk_import_topics():
+    """Create or update many topics from a JSON or YAML document
+    
+    The body is a list of topics (or an object with a "topics" list) in
+    JSON, or in YAML when sent with a YAML content type. Topics are upserted
+    by id, or by name when no id is given, in batched transactions.
+    """
+    yaml_format = request.mimetype in YAML_CONTENT_TYPES
+    try:
+        rows = parse_topic_document(request.get_data(as_text=True), yaml_format=yaml_format)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    results = import_topics(
+        rows,
+        batch_size=app.config.get('TOPIC_IMPORT_BATCH_SIZE', 500),
+        on_commit=lambda topics: scheduler_manager.schedule_topics(app, topics)
+    )
+    
+    summary = {status: sum(1 for result in results if result["status"] == status)
+               for status in ("created", "updated", "error")}
+    logger.info(f"Bulk imported topics: {summary}")
+    return jsonify(dict(summary, results=results))
+
+@app.route('/api/topics/export', methods=['GET'])
+def export_topics_route():
+    """Download every topic as JSON (default) or YAML (?format=yaml)"""
+    yaml_format = request.args.get('format', 'json') == 'yaml'
+    extension = 'yaml' if yaml_format else 'json'
+    
+    return Response(
+        stream_with_context(export_topics(yaml_format=yaml_format)),
+        mimetype='application/yaml' if yaml_format else 'application/json',
+        headers={'Content-Disposition': f'attachment; filename=topics.{extension}'}
+    )
+
 @app.route('/api/topics/<int:topic_id>', methods=['PUT'])
 def update_topic(topic_id):
     """Update an existing research topic"""
-    topic = Topic.query.get_or_404(topic_id)
+    topic = db.get_or_404(Topic, topic_id)
     data = request.json
+    try:
+        frequency, cron, refresh_mode = read_topic_settings(data, topic)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    rescheduled = (frequency, cron) != (topic.frequency, topic.cron)
     topic.name = data['name']
     topic.query = data['query']
+    topic.frequency = frequency
+    topic.cron = cron
+    topic.refresh_mode = refresh_mode
     db.session.commit()
+    
+    # Only touch the topic's job when its schedule changed
+    if rescheduled:
+        scheduler_manager.schedule_topic(app, topic)
     logger.info(f"Updated topic: {data['name']}")
     return jsonify(topic.to_dict())
 
 @app.route('/api/topics/<int:topic_id>', methods=['DELETE'])
 def delete_topic(topic_id):
     """Delete a research topic"""
-    topic = Topic.query.get_or_404(topic_id)
+    topic = db.get_or_404(Topic, topic_id)
     topic_name = topic.name
     db.session.delete(topic)
     db.session.commit()
+    scheduler_manager.unschedule_topic(topic_id)
     logger.info(f"Deleted topic: {topic_name}")
     return jsonify({"message": "Topic deleted successfully"})
 
@@ -146,56 +425,234 @@ def update_schedule():
     logger.info(f"Updated schedule: {data}")
     return jsonify(schedule.to_dict())
 
+def build_status_payload():
+    """Build the database part of the /api/status payload"""
+    status = Status.query.first()
+    # Load each log's topic in the same query instead of one SELECT per log
+    recent_logs = (
+        Log.query.options(joinedload(Log.topic))
+        .order_by(Log.timestamp.desc())
+        .limit(10)
+        .all()
+    )
+    
+    return {
+        "status": status.to_dict(),
+        "recent_activity": [log.to_dict() for log in recent_logs]
+    }
+
+# Rebuilt only after Status or Log writes (or a topic rename/delete, which changes log topic names)
+status_snapshot = Snapshot(
+    'status',
+    build_status_payload,
+    max_age=app.config.get('STATUS_SNAPSHOT_MAX_AGE', 30)
+)
+status_snapshot.watch(Status)
+status_snapshot.watch(Log)
+status_snapshot.watch(Topic, 'name')
+
 @app.route('/api/status', methods=['GET'])
 def get_status():
     """Get current application status"""
-    status = Status.query.first()
-    recent_logs = Log.query.order_by(Log.timestamp.desc()).limit(10).all()
+    payload = status_snapshot.get()
+    
+    # The call counter is kept in the shared usage ledger
+    status_data = dict(payload["status"], api_calls_this_month=api_manager.calls_this_month())
     
     return jsonify({
-        "status": status.to_dict(),
-        "recent_activity": [log.to_dict() for log in recent_logs]
+        "status": status_data,
+        "recent_activity": payload["recent_activity"]
     })
 
+@app.route('/api/events', methods=['GET'])
+def stream_events():
+    """Stream topic status, partial content, activity log and next-run events (Server-Sent Events)"""
+    subscription = event_bus.subscribe()
+    return Response(
+        event_bus.stream(subscription),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Stop nginx from buffering the stream
+        }
+    )
+
+# Sortable columns of the journal index
+JOURNAL_SORT_COLUMNS = {
+    'updated': JournalEntry.updated_at,
+    'topic': JournalEntry.topic_name
+}
+
 @app.route('/api/journal', methods=['GET'])
 def get_journal_entries():
-    """Get list of generated journal entries"""
-    journal_dir = os.path.join('..', 'frontend', 'journal_html')
-    entries = []
-    
-    if os.path.exists(journal_dir):
-        for filename in os.listdir(journal_dir):
-            if filename.endswith('.html'):
-                # Extract metadata from the file (if available)
-                filepath = os.path.join(journal_dir, filename)
-                # Get file modification time
-                mod_time = os.path.getmtime(filepath)
-                mod_date = datetime.datetime.fromtimestamp(mod_time)
-                
-                # Extract topic name from filename (remove .html extension)
-                topic_name = os.path.splitext(filename)[0].replace('-', ' ').title()
-                
-                # Find the corresponding topic in database for additional info
-                topic = Topic.query.filter_by(name=topic_name).first()
-                
-                entries.append({
-                    "filename": filename,
-                    "topic_name": topic_name,
-                    "updated": mod_date.strftime('%Y-%m-%d %H:%M'),
-                    "tags": topic.tags.split(',') if topic and topic.tags else []
-                })
-    
-    return jsonify(entries)
+    """Get a page of generated journal entries from the journal index
+    
+    Query parameters:
+        sort: 'updated' (default) or 'topic'
+        order: 'desc' (default) or 'asc'
+        limit: Page size, at most 200 (default 50)
+        cursor: Value of the X-Next-Cursor header of the previous page
+    """
+    sort = request.args.get('sort', 'updated')
+    order = request.args.get('order', 'desc')
+    limit = max(1, min(request.args.get('limit', 50, type=int), 200))
+    
+    if sort not in JOURNAL_SORT_COLUMNS or order not in ('asc', 'desc'):
+        return jsonify({"error": "Invalid sort or order"}), 400
+    
+    column = JOURNAL_SORT_COLUMNS[sort]
+    query = JournalEntry.query
+    
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            value, last_id = decode_cursor(cursor, types=(str, int))
+            if sort == 'updated':
+                value = datetime.datetime.fromisoformat(value)
+        except (ValueError, TypeError):
+            return jsonify({"error": "Invalid cursor"}), 400
+        
+        key = db.tuple_(column, JournalEntry.id)
+        query = query.filter(key < (value, last_id) if order == 'desc' else key > (value, last_id))
+    
+    if order == 'desc':
+        query = query.order_by(column.desc(), JournalEntry.id.desc())
+    else:
+        query = query.order_by(column.asc(), JournalEntry.id.asc())
+    
+    # Fetch one extra row to know whether there is a next page
+    entries = query.limit(limit + 1).all()
+    response = jsonify([entry.to_dict() for entry in entries[:limit]])
+    
+    if len(entries) > limit:
+        last = entries[limit - 1]
+        value = last.updated_at.isoformat() if sort == 'updated' else last.topic_name
+        response.headers['X-Next-Cursor'] = encode_cursor([value, last.id])
+    
+    return response
+
+@app.route('/api/journal/stats', methods=['GET'])
+def journal_stats():
+    """Get journal statistics (entry, topic and tag counts)"""
+    return jsonify(get_journal_stats())
 
 @app.route('/api/run-now/<int:topic_id>', methods=['POST'])
 def run_now(topic_id):
     """Manually run a search for a specific topic"""
-    topic = Topic.query.get_or_404(topic_id)
+    topic = db.get_or_404(Topic, topic_id)
+    
+    # Queue the search for the background workers to avoid blocking
+    try:
+        job, created = scheduler_manager.run_single_topic(app, topic.id)
+    except queue.Full:
+        logger.warning(f"Manual search queue is full, rejected topic: {topic.name}")
+        return jsonify({"error": "Too many searches are queued, please try again later"}), 503, {'Retry-After': '30'}
+    
+    if created:
+        message = f"Started search for topic: {topic.name}"
+    else:
+        message = f"A search for topic {topic.name} is already {job.state}"
+    
+    return jsonify({"message": message, "job_id": job.id, "state": job.state}), 202
+
+@app.route('/api/jobs', methods=['GET'])
+def get_jobs():
+    """Get the manual search queue depth and its active jobs"""
+    return jsonify(scheduler_manager.job_queue.get_stats())
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get the state of a manual search job"""
+    job = scheduler_manager.job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/runs', methods=['GET'])
+def get_runs():
+    """Get a page of run summaries, newest first
     
-    # Run the search in a background thread to avoid blocking
-    scheduler_manager.run_single_topic(app, topic.id)
+    Query parameters:
+        trigger: Only runs started this way (scheduled or manual)
+        limit: Page size, at most 500 (default 50)
+        cursor: Value of the X-Next-Cursor header of the previous page
+    """
+    limit = max(1, min(request.args.get('limit', 50, type=int), 500))
     
-    return jsonify({"message": f"Started search for topic: {topic.name}"})
+    # Summaries do not need the per-topic spans
+    query = db.session.query(Run).options(defer(Run.timeline))
+    if request.args.get('trigger'):
+        query = query.filter(Run.trigger == request.args['trigger'])
+    
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            (last_id,) = decode_cursor(cursor)
+        except (ValueError, TypeError):
+            return jsonify({"error": "Invalid cursor"}), 400
+        query = query.filter(Run.id < last_id)
+    
+    # Fetch one extra row to know whether there is a next page
+    runs = query.order_by(Run.id.desc()).limit(limit + 1).all()
+    response = jsonify([run.to_dict() for run in runs[:limit]])
+    
+    if len(runs) > limit:
+        response.headers['X-Next-Cursor'] = encode_cursor([runs[limit - 1].id])
+    return response
+
+@app.route('/api/runs/<int:run_id>', methods=['GET'])
+def get_run(run_id):
+    """Get a run with the phase timeline of each of its topics"""
+    run = db.get_or_404(Run, run_id)
+    return jsonify(run.to_dict(include_timeline=True))
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Expose pipeline metrics in the Prometheus text format"""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+@app.cli.command('index-journal')
+def index_journal_command():
+    """Rebuild the journal index and statistics from the journal files on disk"""
+    count = rebuild_journal_index()
+    click.echo(f"Indexed {count} journal entries")
+
+@app.cli.command('import-topics')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', default=500, show_default=True, help='Topics per transaction')
+def import_topics_command(path, batch_size):
+    """Create or update topics from a JSON or YAML file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    
+    try:
+        rows = parse_topic_document(text, yaml_format=path.endswith(('.yaml', '.yml')))
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    
+    db.create_all()
+    upgrade_schema(db.engine)
+    results = import_topics(rows, batch_size=batch_size)
+    
+    for result in results:
+        if result["status"] == "error":
+            click.echo(f"Row {result['row']}: {result['error']}", err=True)
+    created = sum(1 for result in results if result["status"] == "created")
+    updated = sum(1 for result in results if result["status"] == "updated")
+    click.echo(f"Created {created}, updated {updated}, failed {len(results) - created - updated} topics")
+
+@app.cli.command('export-topics')
+@click.argument('path', type=click.Path(dir_okay=False), required=False)
+def export_topics_command(path):
+    """Write every topic to a JSON or YAML file (or stdout)"""
+    yaml_format = bool(path) and path.endswith(('.yaml', '.yml'))
+    output = open(path, 'w', encoding='utf-8') if path else click.get_text_stream('stdout')
+    try:
+        for chunk in export_topics(yaml_format=yaml_format):
+            output.write(chunk)
+    finally:
+        if path:
+            output.close()
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,128 @@
+import json
+import logging
+import queue
+import threading
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+class EventBus:
+    """Fan-out of application events to Server-Sent Events subscribers
+
+    Every subscriber gets its own bounded queue. Publishing never blocks: when
+    a slow subscriber's queue is full its oldest event is dropped.
+    """
+
+    def __init__(self, max_queue=100, heartbeat=15.0):
+        """Initialize the event bus
+
+        Args:
+            max_queue (int, optional): Maximum events buffered per subscriber.
+                Defaults to 100.
+            heartbeat (float, optional): Seconds between keep-alive comments on
+                idle streams. Defaults to 15.0.
+        """
+        self.max_queue = max_queue
+        self.heartbeat = heartbeat
+        self.subscribers = set()
+        self.lock = threading.Lock()
+
+    def subscribe(self):
+        """Register a new subscriber
+
+        Returns:
+            queue.Queue: The subscriber's event queue
+        """
+        subscription = queue.Queue(maxsize=self.max_queue)
+        with self.lock:
+            self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Remove a subscriber
+
+        Args:
+            subscription (queue.Queue): Queue returned by subscribe
+        """
+        with self.lock:
+            self.subscribers.discard(subscription)
+
+    def publish(self, event_type, data):
+        """Send an event to every subscriber
+
+        Args:
+            event_type (str): SSE event name
+            data: JSON-serializable event payload
+        """
+        message = (event_type, data)
+        with self.lock:
+            subscribers = list(self.subscribers)
+
+        for subscription in subscribers:
+            while True:
+                try:
+                    subscription.put_nowait(message)
+                    break
+                except queue.Full:
+                    try:
+                        subscription.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    def stream(self, subscription):
+        """Generate an SSE response body for a subscriber
+
+        Args:
+            subscription (queue.Queue): Queue returned by subscribe
+
+        Yields:
+            str: SSE-formatted messages and keep-alive comments
+        """
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event_type, data = subscription.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+        finally:
+            self.unsubscribe(subscription)
+
+    def publish_inserts(self, model, event_type):
+        """Publish every committed insert of a model as an event
+
+        Rows are serialized with their to_dict() once flushed and published
+        only once the transaction commits.
+
+        Args:
+            model: Model class to watch
+            event_type (str): SSE event name
+        """
+        key = f"events:{event_type}"
+        flushed_key = f"events:{event_type}:flushed"
+
+        @event.listens_for(Session, "after_flush")
+        def collect_inserts(session, flush_context):
+            inserted = [obj for obj in session.new if isinstance(obj, model)]
+            if inserted:
+                session.info[flushed_key] = inserted
+
+        @event.listens_for(Session, "after_flush_postexec")
+        def serialize_inserts(session, flush_context):
+            # Rows are persistent here, so to_dict() can load relationships
+            inserted = session.info.pop(flushed_key, None)
+            if inserted:
+                session.info.setdefault(key, []).extend(obj.to_dict() for obj in inserted)
+
+        @event.listens_for(Session, "after_commit")
+        def publish_committed(session):
+            for data in session.info.pop(key, []):
+                self.publish(event_type, data)
+
+        @event.listens_for(Session, "after_soft_rollback")
+        def forget_rolled_back(session, previous_transaction):
+            if previous_transaction.parent is None:
+                session.info.pop(key, None)
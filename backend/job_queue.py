@@ -0,0 +1,161 @@
+import logging
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+class Job:
+    """A unit of work submitted to a JobQueue"""
+
+    def __init__(self, key, args):
+        """Initialize the job
+
+        Args:
+            key: Deduplication key; at most one job per key is active
+            args (tuple): Arguments passed to the queue's handler
+        """
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.args = args
+        self.state = "queued"  # queued, running, completed, failed
+        self.error = None
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self):
+        """Convert the job to a dictionary for JSON serialization"""
+        return {
+            "id": self.id,
+            "key": self.key,
+            "state": self.state,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class JobQueue:
+    """Bounded job queue served by a fixed number of worker threads
+
+    Submitting a key that already has a queued or running job returns that
+    job instead of creating another one. Finished jobs are kept for a while
+    so their state can still be looked up.
+    """
+
+    def __init__(self, handler, workers=2, max_size=20, history=200):
+        """Initialize the job queue
+
+        Args:
+            handler (callable): Function called with each job's args
+            workers (int, optional): Number of worker threads. Defaults to 2.
+            max_size (int, optional): Maximum number of queued jobs. Defaults to 20.
+            history (int, optional): Number of finished jobs kept for lookups.
+                Defaults to 200.
+        """
+        self.handler = handler
+        self.workers = max(1, int(workers))
+        self.max_size = max_size
+        self.history = history
+        self.pending = queue.Queue(maxsize=max_size)
+        self.jobs = OrderedDict()  # Job ID -> Job, oldest first
+        self.active = {}  # Key -> queued or running Job
+        self.lock = threading.Lock()
+        self.threads = []
+
+    def _ensure_workers(self):
+        """Start the worker threads if needed (caller holds the lock)"""
+        self.threads = [thread for thread in self.threads if thread.is_alive()]
+        for index in range(len(self.threads), self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def submit(self, key, *args):
+        """Queue a job unless one with the same key is already active
+
+        Args:
+            key: Deduplication key
+            *args: Arguments passed to the handler
+
+        Returns:
+            tuple: The active job for the key and whether it was newly created
+
+        Raises:
+            queue.Full: If the queue has no room for a new job
+        """
+        with self.lock:
+            job = self.active.get(key)
+            if job is not None:
+                return job, False
+
+            job = Job(key, args)
+            self.pending.put_nowait(job)
+            self.active[key] = job
+            self.jobs[job.id] = job
+            self._prune()
+            self._ensure_workers()
+            return job, True
+
+    def get(self, job_id):
+        """Look up a job by ID
+
+        Args:
+            job_id (str): Job ID
+
+        Returns:
+            Job: The job, or None if it is unknown or was pruned
+        """
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond the history size (caller holds the lock)"""
+        excess = len(self.jobs) - len(self.active) - self.history
+        for job_id in list(self.jobs):
+            if excess <= 0:
+                break
+            if self.jobs[job_id].state in ("completed", "failed"):
+                del self.jobs[job_id]
+                excess -= 1
+
+    def _work(self):
+        """Worker loop: run queued jobs one at a time"""
+        while True:
+            job = self.pending.get()
+            with self.lock:
+                job.state = "running"
+                job.started_at = datetime.now()
+
+            try:
+                self.handler(*job.args)
+                state, error = "completed", None
+            except Exception as e:
+                logger.error(f"Job {job.id} for {job.key} failed: {str(e)}")
+                state, error = "failed", str(e)
+
+            with self.lock:
+                job.state = state
+                job.error = error
+                job.finished_at = datetime.now()
+                self.active.pop(job.key, None)
+            self.pending.task_done()
+
+    def get_stats(self):
+        """Get the queue depth, worker configuration and active jobs
+
+        Returns:
+            dict: Queue statistics
+        """
+        with self.lock:
+            running = sum(1 for job in self.active.values() if job.state == "running")
+            return {
+                "queued": len(self.active) - running,
+                "running": running,
+                "workers": self.workers,
+                "max_size": self.max_size,
+                "jobs": [job.to_dict() for job in self.active.values()]
+            }
@@ -1,22 +1,148 @@
 import os
 import re
+import json
+import gzip
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
 from datetime import datetime
 import logging
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 import html
 import markdown
+from models import db, JournalEntry, JournalStat
+from metrics import timed
+
+try:
+    import brotli
+except ImportError:  # Optional, brotli variants are skipped without it
+    brotli = None
 
 logger = logging.getLogger(__name__)
 
-def generate_journal_entry(topic, api_response):
+CONTENT_HASH_PATTERN = re.compile(r'<meta name="content-hash" content="([0-9a-f]+)">')
+
+TEMPLATE_DIR = os.path.join('frontend', 'templates')
+
+# Names of the journal template, in order of preference
+JOURNAL_TEMPLATES = ('journal_entry.html', 'journal-entry.html')
+
+# Reply the delta prompt asks for when nothing has changed
+NO_UPDATES_PATTERN = re.compile(r'^\W*no significant updates\W*$', re.IGNORECASE)
+
+# Reference-style link definitions such as "[1]: https://example.org"
+REFERENCE_DEFINITION_PATTERN = re.compile(r'^ {0,3}\[[^\]\n]+\]:[ \t]*\S.*$', re.MULTILINE)
+
+# Heading of new material that came without a section heading
+LATEST_SECTION = 'Latest Developments'
+
+# Rendered HTML of recently seen markdown sections, keyed by content hash
+SECTION_CACHE_SIZE = 1024
+_section_cache = OrderedDict()
+_section_cache_lock = threading.Lock()
+
+# Shared render engine; compiled templates are kept across calls
+_environment = None
+_environment_lock = threading.RLock()
+
+def configure_renderer(template_dir=TEMPLATE_DIR, bytecode_cache_dir=None):
+    """Create the shared Jinja2 environment used to render journal entries
+    
+    Compiled templates are cached in memory and only recompiled when the
+    template file's modification time changes. With a bytecode cache
+    directory, compiled templates also survive process restarts.
+    
+    Args:
+        template_dir (str, optional): Directory containing the journal template.
+            Defaults to TEMPLATE_DIR.
+        bytecode_cache_dir (str, optional): Directory for the persistent Jinja2
+            bytecode cache. Defaults to None (in-memory caching only).
+        
+    Returns:
+        Environment: The configured environment
+    """
+    global _environment
+    
+    bytecode_cache = None
+    if bytecode_cache_dir:
+        os.makedirs(bytecode_cache_dir, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(bytecode_cache_dir)
+    
+    environment = Environment(
+        loader=FileSystemLoader(template_dir),
+        bytecode_cache=bytecode_cache,
+        auto_reload=True  # Checks the template mtime before reusing a compiled template
+    )
+    
+    with _environment_lock:
+        _environment = environment
+    
+    logger.info(f"Configured journal renderer for {template_dir}")
+    return environment
+
+def get_environment():
+    """Get the shared Jinja2 environment, creating it with defaults if needed
+    
+    Returns:
+        Environment: The shared environment
+    """
+    if _environment is None:
+        with _environment_lock:
+            if _environment is None:
+                return configure_renderer()
+    return _environment
+
+def get_journal_template():
+    """Get the compiled journal entry template from the shared environment
+    
+    Returns:
+        Template: The first of JOURNAL_TEMPLATES found in the template directory
+    """
+    return get_environment().select_template(JOURNAL_TEMPLATES)
+
+def journal_filename(topic):
+    """Get the journal entry filename of a topic
+    
+    Args:
+        topic: Topic database model instance
+        
+    Returns:
+        str: Filename of the topic's HTML file
+    """
+    return f"{topic.name.lower().replace(' ', '-')}.html"
+
+def get_previous_entry(topic):
+    """Get the stored markdown and citations of a topic's current entry
+    
+    Args:
+        topic: Topic database model instance
+        
+    Returns:
+        tuple: Markdown and citations list, or None if the topic has no entry
+            with stored markdown
+    """
+    entry = JournalEntry.query.filter_by(filename=journal_filename(topic)).first()
+    if entry is None or not entry.markdown:
+        return None
+    return entry.markdown, json.loads(entry.citations) if entry.citations else []
+
+def generate_journal_entry(topic, api_response, previous=None):
     """Generate an HTML journal entry from Perplexity API response
     
     Args:
         topic: Topic database model instance
         api_response: Processed response from Perplexity API
+        previous (tuple, optional): Markdown and citations of the previous
+            entry from get_previous_entry. When given, the response is treated
+            as a delta and merged into the previous entry section by section.
+            Defaults to None.
         
     Returns:
         str: Filename of the generated HTML file
+    
+    The entry is also recorded in the JournalEntry index; the caller is
+    responsible for committing the database session.
     """
     logger.info(f"Generating journal entry for topic: {topic.name}")
     
@@ -25,24 +151,31 @@ def generate_journal_entry(topic, api_response):
     os.makedirs(journal_dir, exist_ok=True)
     
     # Create a filename from the topic name
-    filename = f"{topic.name.lower().replace(' ', '-')}.html"
+    filename = journal_filename(topic)
     filepath = os.path.join(journal_dir, filename)
     
-    # Load template environment
-    template_dir = os.path.join('frontend', 'templates')
-    env = Environment(loader=FileSystemLoader(template_dir))
-    template = env.get_template('journal_entry.html')
+    # Compiled template from the shared render engine
+    template = get_journal_template()
     
     # Process content from API response
-    content = api_response.get('content', '')
+    source = api_response.get('content', '')
     citations = api_response.get('citations', [])
     
-    # Convert markdown to HTML if content appears to be markdown
-    if '##' in content or '*' in content:
-        content = markdown.markdown(content)
+    with timed("markdown"):
+        if previous is not None:
+            previous_markdown, previous_citations = previous
+            source = merge_sections(previous_markdown, source)
+            citations = previous_citations + [c for c in citations if c not in previous_citations]
+        
+        # Convert markdown to HTML if content appears to be markdown; merged
+        # entries only convert their changed sections
+        content = source
+        if looks_like_markdown(content):
+            content = render_markdown_sections(content) if previous is not None else render_markdown(content)
     
     # Extract potential tags from content
-    tags = extract_tags(content, topic.name)
+    with timed("extract_tags"):
+        tags = extract_tags(content, topic.name)
     
     # Get current time for the update timestamp
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -52,21 +185,339 @@ def generate_journal_entry(topic, api_response):
         'title': topic.name,
         'content': content,
         'citations': citations,
-        'timestamp': timestamp,
         'tags': tags,
         'query': topic.query
     }
     
-    # Render the template
-    html_content = template.render(**template_data)
+    with timed("render"):
+        # Hash everything that affects the entry except the timestamp
+        content_hash = compute_content_hash(template_data, template)
+        
+        # Render the template
+        html_content = template.render(timestamp=timestamp, content_hash=content_hash, **template_data)
     
-    # Write to file
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+    # Write to file, skipping unchanged entries
+    with timed("write"):
+        changed = write_journal_file(filepath, html_content, content_hash)
+    if changed:
+        logger.info(f"Journal entry generated: {filepath}")
+    else:
+        logger.info(f"Journal entry unchanged, kept existing file: {filepath}")
     
-    logger.info(f"Journal entry generated: {filepath}")
+    entry = index_journal_entry(topic, filename, tags, content_hash, changed)
+    # Keep the source so the next delta refresh can merge into it
+    entry.markdown = source
+    entry.citations = json.dumps(citations)
     return filename
 
+def split_sections(text):
+    """Split markdown into sections at its '## ' headings
+    
+    Args:
+        text (str): Markdown text
+        
+    Returns:
+        list: (heading, markdown) pairs in document order. The markdown
+            includes the heading line; text before the first heading has
+            the heading None.
+    """
+    sections = []
+    heading, lines = None, []
+    for line in text.splitlines():
+        if line.startswith('## '):
+            if heading is not None or any(l.strip() for l in lines):
+                sections.append((heading, '\n'.join(lines).strip()))
+            heading, lines = line[3:].strip(), [line]
+        else:
+            lines.append(line)
+    
+    if heading is not None or any(l.strip() for l in lines):
+        sections.append((heading, '\n'.join(lines).strip()))
+    return sections
+
+def merge_sections(previous, delta):
+    """Merge new material into a previous entry section by section
+    
+    New material under a heading that already exists is appended to that
+    section, new headings are added at the end, and text without a heading
+    goes to the LATEST_SECTION section. A "no significant updates" reply
+    leaves the entry unchanged.
+    
+    Args:
+        previous (str): Markdown of the previous entry
+        delta (str): Markdown of the new material
+        
+    Returns:
+        str: Merged markdown
+    """
+    sections = split_sections(previous)
+    positions = {heading.lower(): i for i, (heading, _) in enumerate(sections) if heading}
+    
+    for heading, body in split_sections(delta):
+        if heading is None:
+            if NO_UPDATES_PATTERN.match(body):
+                continue
+            heading, body = LATEST_SECTION, f"## {LATEST_SECTION}\n\n{body}"
+        
+        position = positions.get(heading.lower())
+        if position is None:
+            positions[heading.lower()] = len(sections)
+            sections.append((heading, body))
+            continue
+        
+        # Drop the repeated heading line and append the new paragraphs
+        addition = body.partition('\n')[2].strip()
+        if addition:
+            existing_heading, existing = sections[position]
+            sections[position] = (existing_heading, f"{existing}\n\n{addition}")
+    
+    return '\n\n'.join(body for _, body in sections)
+
+def render_section(text):
+    """Convert one markdown section to HTML, reusing cached results
+    
+    Args:
+        text (str): Markdown of the section
+        
+    Returns:
+        str: HTML of the section
+    """
+    key = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    with _section_cache_lock:
+        cached = _section_cache.get(key)
+        if cached is not None:
+            _section_cache.move_to_end(key)
+            return cached
+    
+    rendered = markdown.markdown(text)
+    
+    with _section_cache_lock:
+        _section_cache[key] = rendered
+        while len(_section_cache) > SECTION_CACHE_SIZE:
+            _section_cache.popitem(last=False)
+    return rendered
+
+def looks_like_markdown(text):
+    """Check whether an answer appears to be markdown rather than plain text
+    
+    Args:
+        text (str): Answer text
+        
+    Returns:
+        bool: True if the text contains headings or emphasis
+    """
+    return '##' in text or '*' in text
+
+def render_markdown(text):
+    """Convert a markdown document to HTML
+    
+    Args:
+        text (str): Markdown text
+        
+    Returns:
+        str: HTML
+    """
+    return markdown.markdown(text)
+
+def render_markdown_sections(text):
+    """Convert markdown to HTML one '## ' section at a time
+    
+    Sections that are unchanged since an earlier render are served from the
+    section cache, so a merged entry only converts its changed sections.
+    Reference-style link definitions apply to the whole document, so they
+    are appended to every section before it is converted.
+    
+    Args:
+        text (str): Markdown text
+        
+    Returns:
+        str: HTML
+    """
+    definitions = '\n'.join(
+        match.group(0).strip() for match in REFERENCE_DEFINITION_PATTERN.finditer(text)
+    )
+    return '\n'.join(
+        render_section(f"{section}\n\n{definitions}" if definitions else section)
+        for _, section in split_sections(text)
+    )
+
+def index_journal_entry(topic, filename, tags, content_hash, changed=True):
+    """Record a journal entry in the JournalEntry index
+    
+    Args:
+        topic: Topic database model instance
+        filename (str): Filename of the journal HTML file
+        tags (list): Tags shown on the entry
+        content_hash (str): Hash from compute_content_hash
+        changed (bool, optional): Whether the file was rewritten. The update
+            time of an existing entry is only moved for real changes.
+            Defaults to True.
+        
+    Returns:
+        JournalEntry: The added or updated index row (not yet committed)
+    """
+    entry = JournalEntry.query.filter_by(filename=filename).first()
+    if entry is None:
+        entry = JournalEntry(filename=filename)
+        db.session.add(entry)
+        changed = True
+        old_topic_name, old_tags = None, []
+    else:
+        old_topic_name = entry.topic_name
+        old_tags = entry.tags.split(',') if entry.tags else []
+    
+    entry.topic_id = topic.id
+    entry.topic_name = topic.name
+    entry.tags = ','.join(tags)
+    entry.content_hash = content_hash
+    if changed:
+        entry.updated_at = datetime.now()
+    
+    # Keep the journal statistics in step with the added or replaced entry
+    if old_topic_name is None:
+        JournalStat.adjust('total', '', 1)
+    if old_topic_name != topic.name:
+        if old_topic_name is not None:
+            JournalStat.adjust('topic', old_topic_name, -1)
+        JournalStat.adjust('topic', topic.name, 1)
+    for tag in old_tags:
+        JournalStat.adjust('tag', tag, -1)
+    for tag in tags:
+        JournalStat.adjust('tag', tag, 1)
+    
+    topic.tags = entry.tags
+    return entry
+
+def compute_content_hash(template_data, template):
+    """Hash the inputs of a journal entry
+    
+    The render timestamp is deliberately excluded so that re-running a topic
+    with the same results produces the same hash. The template's modification
+    time is included so that template edits still cause a rewrite.
+    
+    Args:
+        template_data (dict): Template variables other than the timestamp
+        template: Compiled Jinja2 template
+        
+    Returns:
+        str: Hex digest of the entry content
+    """
+    template_mtime = os.stat(template.filename).st_mtime_ns if template.filename else 0
+    material = json.dumps([template_data, template.name, template_mtime], sort_keys=True)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+def read_content_hash(filepath):
+    """Read the content hash recorded in an existing journal entry
+    
+    Args:
+        filepath (str): Path of the journal HTML file
+        
+    Returns:
+        str: The recorded hash, or None if the file is missing or has none
+    """
+    try:
+        with open(filepath, 'rb') as f:
+            head = f.read(1024)  # The hash is in a meta tag at the top of <head>
+    except OSError:
+        return None
+    
+    match = CONTENT_HASH_PATTERN.search(head.decode('utf-8', errors='replace'))
+    return match.group(1) if match else None
+
+def write_journal_file(filepath, html_content, content_hash):
+    """Atomically write a journal entry unless its content is unchanged
+    
+    The HTML is written to a temporary file in the same directory and renamed
+    over the target, so readers never see a partially written entry. Gzip
+    and (if available) brotli siblings are written alongside it for serving
+    to clients that accept them. If the existing file records the same
+    content hash nothing is written, and its modification time is left alone.
+    
+    Args:
+        filepath (str): Path of the journal HTML file
+        html_content (str): Rendered HTML
+        content_hash (str): Hash from compute_content_hash
+        
+    Returns:
+        bool: True if the file was written, False if it was unchanged
+    """
+    if read_content_hash(filepath) == content_hash:
+        return False
+    
+    data = html_content.encode('utf-8')
+    
+    # Compressed variants go first so they are never older than the HTML
+    for extension, compress in compressed_variants():
+        _atomic_write(filepath + extension, compress(data))
+    _atomic_write(filepath, data)
+    
+    return True
+
+def compressed_variants():
+    """List the precompressed variants written next to each journal entry
+    
+    Returns:
+        list: (file extension, compress function) pairs
+    """
+    variants = [('.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', lambda data: brotli.compress(data, mode=brotli.MODE_TEXT)))
+    return variants
+
+def _atomic_write(filepath, data):
+    """Write bytes to a temporary file and rename it over filepath
+    
+    Args:
+        filepath (str): Target path
+        data (bytes): File content
+    """
+    directory = os.path.dirname(filepath) or '.'
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.journal-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, filepath)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+class ProgressiveRenderer:
+    """Render a streamed markdown answer while it is still arriving
+    
+    A section is complete once the next '## ' heading has arrived. Complete
+    sections are converted once, through the section cache, so only the
+    trailing, still growing section is converted again on each update. The
+    finished answer is rendered as a whole document by generate_journal_entry.
+    """
+    
+    def __init__(self):
+        """Initialize the renderer"""
+        self.rendered = []  # HTML of the complete sections
+    
+    def feed(self, text):
+        """Render the answer received so far
+        
+        Args:
+            text (str): Markdown received so far
+            
+        Returns:
+            str: HTML preview of the answer
+        """
+        sections = split_sections(text)
+        for _, section in sections[len(self.rendered):-1]:
+            self.rendered.append(render_section(section))
+        
+        parts = list(self.rendered)
+        if len(sections) > len(self.rendered):
+            parts.append(markdown.markdown(sections[-1][1]))
+        return '\n'.join(parts)
+
 def extract_tags(content, topic_name):
     """Extract potential tags from content based on keyword frequency
     
@@ -0,0 +1,195 @@
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+class UsageLedger:
+    """Durable counters shared by every worker process and thread
+
+    Counters live in a SQLite file and are only ever changed with atomic
+    ``value = value + ?`` upserts, so concurrent processes never lose
+    increments. Increments are collected in memory and written in one
+    transaction every flush_interval seconds, which keeps database writes
+    off the request path. Reads combine the shared totals (which include
+    other processes' increments), reloaded when they are older than
+    flush_interval, with this process's pending ones.
+    """
+
+    def __init__(self, path, flush_interval=2.0):
+        """Initialize the ledger
+
+        Args:
+            path (str): Path of the SQLite ledger file, or ":memory:" for a
+                ledger private to this process
+            flush_interval (float, optional): Seconds between flushes of pending
+                increments, and the maximum age of the shared totals a read
+                uses. Defaults to 2.0.
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.pending = defaultdict(float)
+        self.in_flight = {}  # Increments being written, until totals include them
+        self.totals = {}
+        self.loaded_at = 0.0  # time.monotonic() of the last reload of totals
+        self.lock = threading.Lock()  # Guards pending, in_flight and totals
+        self.flush_lock = threading.Lock()  # Serializes flushes within the process
+        self._conn = None
+        self._pid = None
+        self._flusher = None
+        self._stopped = threading.Event()
+
+        directory = os.path.dirname(path) if path != ":memory:" else ""
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.refresh()
+        atexit.register(self.close)
+
+    def _connection(self):
+        """Get the SQLite connection for the current process
+
+        Connections are not shared across fork(), so a new one is opened the
+        first time the ledger is used in each process.
+        """
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(
+                self.path,
+                timeout=30,
+                check_same_thread=False,
+                isolation_level=None
+            )
+            if self.path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS counters ("
+                " name TEXT PRIMARY KEY,"
+                " value REAL NOT NULL DEFAULT 0)"
+            )
+            self._pid = os.getpid()
+        return self._conn
+
+    def _ensure_flusher(self):
+        """Start the background flush thread in this process if needed"""
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+
+        self._flusher = threading.Thread(target=self._flush_loop, name="ledger-flush", daemon=True)
+        self._flusher.start()
+
+    def _flush_loop(self):
+        """Flush pending increments every flush_interval seconds"""
+        while not self._stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                logger.error(f"Failed to flush usage ledger: {e}")
+
+    def increment(self, name, amount=1):
+        """Add to a counter
+
+        Args:
+            name (str): Counter name
+            amount (float, optional): Amount to add. Defaults to 1.
+        """
+        with self.lock:
+            self.pending[name] += amount
+        self._ensure_flusher()
+
+    def get(self, name):
+        """Read a counter
+
+        Args:
+            name (str): Counter name
+
+        Returns:
+            float: Shared total plus this process's unflushed increments
+        """
+        if time.monotonic() - self.loaded_at > self.flush_interval:
+            # Pick up other processes' increments; skip if a reload is under way
+            if self.flush_lock.acquire(blocking=False):
+                try:
+                    self._load_totals()
+                except sqlite3.Error as e:
+                    logger.error(f"Failed to read usage ledger: {e}")
+                finally:
+                    self.flush_lock.release()
+
+        with self.lock:
+            return (
+                self.totals.get(name, 0.0)
+                + self.in_flight.get(name, 0.0)
+                + self.pending.get(name, 0.0)
+            )
+
+    def flush(self):
+        """Write pending increments and reload the shared totals"""
+        with self.flush_lock:
+            with self.lock:
+                pending = dict(self.pending)
+                self.pending.clear()
+                # Still counted by get() until the new totals are installed
+                self.in_flight = pending
+
+            conn = self._connection()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    "INSERT INTO counters (name, value) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                    list(pending.items())
+                )
+                totals = dict(conn.execute("SELECT name, value FROM counters"))
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                # Keep the increments so the next flush can retry them
+                with self.lock:
+                    for name, amount in pending.items():
+                        self.pending[name] += amount
+                    self.in_flight = {}
+                raise
+
+            with self.lock:
+                self.totals = totals
+                self.in_flight = {}
+                self.loaded_at = time.monotonic()
+
+    def refresh(self):
+        """Reload the shared totals without writing"""
+        with self.flush_lock:
+            self._load_totals()
+
+    def _load_totals(self):
+        """Read the shared totals (caller holds the flush lock)"""
+        totals = dict(self._connection().execute("SELECT name, value FROM counters"))
+        with self.lock:
+            self.totals = totals
+            self.loaded_at = time.monotonic()
+
+    def get_stats(self):
+        """Get ledger configuration and the number of unflushed counters
+
+        Returns:
+            dict: Ledger statistics
+        """
+        with self.lock:
+            return {
+                "path": self.path,
+                "flush_interval": self.flush_interval,
+                "pending_counters": len(self.pending)
+            }
+
+    def close(self):
+        """Stop the flush thread and write any pending increments"""
+        self._stopped.set()
+        try:
+            if self.pending:
+                self.flush()
+        except sqlite3.Error as e:
+            logger.error(f"Failed to flush usage ledger on close: {e}")
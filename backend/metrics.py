@@ -0,0 +1,250 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from timeline import span
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value):
+    """Escape a label value for the text format"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value):
+    """Format a sample value for the text format"""
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+class Metric(ABC):
+    """Base class of metrics with optional labels
+
+    Samples are kept per combination of label values, passed to the update
+    methods as keyword arguments.
+    """
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        """Initialize the metric
+
+        Args:
+            name (str): Metric name
+            documentation (str): Help text
+            labelnames (tuple, optional): Names of the metric's labels. Defaults to ().
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}  # Tuple of label values -> sample state
+        self.lock = threading.Lock()
+
+    def _key(self, labels):
+        """Get the label values tuple for keyword labels"""
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _label_text(self, key, extra=()):
+        """Format label values (and extra name/value pairs) as {name="value",...}"""
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    @abstractmethod
+    def samples(self):
+        """Yield (suffix, label text, value) for every sample"""
+
+    def render(self):
+        """Render the metric in the text exposition format
+
+        Returns:
+            str: HELP and TYPE lines followed by the samples
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+class Counter(Metric):
+    """Monotonically increasing count; by convention its name ends in _total"""
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        """Add to the count of the given labels"""
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        with self.lock:
+            items = list(self.values.items())
+        for key, value in items:
+            yield "", self._label_text(key), value
+
+class Gauge(Metric):
+    """Value that can go up and down, or is read from a callback at scrape time"""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.function = None
+
+    def set(self, value, **labels):
+        """Set the value of the given labels"""
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def inc(self, amount=1, **labels):
+        """Add to the value of the given labels"""
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        """Subtract from the value of the given labels"""
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels):
+        """Count the with block as in progress while it runs"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def set_function(self, function):
+        """Read the (unlabelled) value from function whenever metrics are rendered"""
+        self.function = function
+
+    def samples(self):
+        if self.function is not None:
+            yield "", "", self.function()
+            return
+        with self.lock:
+            items = list(self.values.items())
+        for key, value in items:
+            yield "", self._label_text(key), value
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """Initialize the histogram
+
+        Args:
+            name (str): Metric name
+            documentation (str): Help text
+            labelnames (tuple, optional): Names of the metric's labels. Defaults to ().
+            buckets (tuple, optional): Upper bounds of the buckets, ascending.
+                Defaults to DEFAULT_BUCKETS.
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        """Record a value for the given labels"""
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [[0] * len(self.buckets), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with block in seconds"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self.lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self.values.items()]
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield "_bucket", self._label_text(key, [("le", _format_value(float(bound)))]), cumulative
+            yield "_sum", self._label_text(key), total
+            yield "_count", self._label_text(key), cumulative
+
+class Registry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def register(self, metric):
+        """Add a metric, or return the already registered metric of the same name
+
+        Args:
+            metric (Metric): Metric to add
+
+        Returns:
+            Metric: The registered metric
+        """
+        with self.lock:
+            return self.metrics.setdefault(metric.name, metric)
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format
+
+        Returns:
+            str: Exposition text
+        """
+        with self.lock:
+            metrics = list(self.metrics.values())
+        return "".join(metric.render() for metric in metrics)
+
+REGISTRY = Registry()
+
+def counter(name, documentation, labelnames=()):
+    """Create and register a Counter"""
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+def gauge(name, documentation, labelnames=()):
+    """Create and register a Gauge"""
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    """Create and register a Histogram"""
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+STAGE_SECONDS = histogram(
+    "journal_stage_duration_seconds",
+    "Time spent in each stage of journal generation",
+    ("stage",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
+@contextmanager
+def timed(stage):
+    """Time a journal generation stage
+
+    The duration is observed in the stage histogram and recorded as a span
+    of the current run timeline, if any.
+
+    Args:
+        stage (str): Stage name, e.g. "markdown", "extract_tags", "render" or "write"
+    """
+    with STAGE_SECONDS.time(stage=stage), span(stage):
+        yield
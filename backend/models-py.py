@@ -1,8 +1,113 @@
+import json
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, inspect, literal, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 
 db = SQLAlchemy()
 
+# Insert constructs with ON CONFLICT support, by dialect name
+UPSERT_INSERTS = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert
+}
+
+def sqlite_engine_options(database_uri, pool_size=10, busy_timeout=30.0):
+    """Build engine options for a SQLite database shared by many threads
+    
+    Args:
+        database_uri (str): SQLAlchemy database URI
+        pool_size (int, optional): Connections kept open for the request,
+            scheduler and job threads. Defaults to 10.
+        busy_timeout (float, optional): Seconds a connection waits for a
+            lock held by another writer. Defaults to 30.0.
+        
+    Returns:
+        dict: Options for SQLALCHEMY_ENGINE_OPTIONS (empty for other databases)
+    """
+    if not database_uri.startswith("sqlite"):
+        return {}
+    
+    options = {"connect_args": {"timeout": busy_timeout}}
+    
+    # In-memory databases use a single connection per thread instead of a pool
+    if database_uri.rstrip("/") not in ("sqlite:", "sqlite:///:memory:"):
+        options.update(
+            pool_size=pool_size,
+            max_overflow=pool_size,
+            pool_timeout=busy_timeout
+        )
+    return options
+
+def apply_sqlite_pragmas(engine, busy_timeout=30.0, synchronous="NORMAL"):
+    """Set WAL journaling and lock handling on every new SQLite connection
+    
+    WAL lets readers proceed while a writer holds the database, and with
+    synchronous=NORMAL commits no longer wait for a sync of the log.
+    
+    Args:
+        engine: SQLAlchemy engine
+        busy_timeout (float, optional): Seconds to wait for a lock. Defaults to 30.0.
+        synchronous (str, optional): Value of the synchronous pragma. Defaults to "NORMAL".
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout * 1000)}")
+            cursor.execute(f"PRAGMA synchronous={synchronous}")
+        finally:
+            cursor.close()
+
+def upgrade_schema(engine):
+    """Add the columns and indexes a database created by an older version lacks
+    
+    db.create_all() only creates missing tables, so columns that were added
+    to existing models later are added here with ALTER TABLE ... ADD COLUMN.
+    Existing rows get the column's default when it is a constant and NULL
+    otherwise. Columns that already exist are left alone, so this can run
+    on every start.
+    
+    Args:
+        engine: SQLAlchemy engine
+        
+    Returns:
+        list: "table.column" names of the added columns
+    """
+    inspector = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+    added = []
+    with engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                
+                ddl = (
+                    f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN "
+                    f"{preparer.format_column(column)} {column.type.compile(dialect=engine.dialect)}"
+                )
+                if column.default is not None and column.default.is_scalar:
+                    value = literal(column.default.arg, column.type).compile(
+                        dialect=engine.dialect, compile_kwargs={"literal_binds": True}
+                    )
+                    ddl += f" DEFAULT {value}"
+                connection.execute(text(ddl))
+                added.append(f"{table.name}.{column.name}")
+            
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+    return added
+
 class Topic(db.Model):
     """Research topic model"""
     id = db.Column(db.Integer, primary_key=True)
@@ -10,8 +115,25 @@ class Topic(db.Model):
     query = db.Column(db.Text, nullable=False)
     tags = db.Column(db.String(255), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.now)
+    modified_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now, index=True)  # Any change to the row
     last_updated = db.Column(db.DateTime, nullable=True)
     status = db.Column(db.String(50), default="pending")  # pending, active, completed, error
+    cost_total = db.Column(db.Float, default=0.0)  # USD spent on API calls for this topic
+    cost_runs = db.Column(db.Integer, default=0)  # Number of paid API calls in cost_total
+    frequency = db.Column(db.String(50), nullable=True)  # daily, weekly, monthly; None uses the global schedule
+    cron = db.Column(db.String(100), nullable=True)  # Crontab expression overriding frequency and time of day
+    refresh_mode = db.Column(db.String(20), default="full")  # full, delta (only ask for new developments)
+    
+    def average_cost(self):
+        """Average API cost per run, or None if the topic has no cost history"""
+        if not self.cost_runs:
+            return None
+        return self.cost_total / self.cost_runs
+    
+    def record_cost(self, cost):
+        """Add the cost of a paid API call to the topic's history"""
+        self.cost_total = (self.cost_total or 0.0) + cost
+        self.cost_runs = (self.cost_runs or 0) + 1
     
     def to_dict(self):
         """Convert model to dictionary for JSON serialization"""
@@ -22,7 +144,11 @@ class Topic(db.Model):
             "tags": self.tags.split(",") if self.tags else [],
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "last_updated": self.last_updated.isoformat() if self.last_updated else None,
-            "status": self.status
+            "status": self.status,
+            "average_cost": self.average_cost(),
+            "frequency": self.frequency,
+            "cron": self.cron,
+            "refresh_mode": self.refresh_mode or "full"
         }
 
 class Schedule(db.Model):
@@ -79,3 +205,111 @@ class Log(db.Model):
             "status": self.status,
             "message": self.message
         }
+
+class JournalEntry(db.Model):
+    """Index of generated journal entry files"""
+    id = db.Column(db.Integer, primary_key=True)
+    topic_id = db.Column(db.Integer, db.ForeignKey('topic.id'), nullable=True, index=True)
+    topic_name = db.Column(db.String(255), nullable=False)
+    filename = db.Column(db.String(255), nullable=False, unique=True)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    tags = db.Column(db.String(255), nullable=True)
+    content_hash = db.Column(db.String(64), nullable=True)
+    markdown = db.Column(db.Text, nullable=True)  # Source of the entry, merged into by delta refreshes
+    citations = db.Column(db.Text, nullable=True)  # JSON list of the entry's citations
+    
+    __table_args__ = (
+        db.Index('ix_journal_entry_updated_at_id', 'updated_at', 'id'),
+        db.Index('ix_journal_entry_topic_name_id', 'topic_name', 'id'),
+    )
+    
+    def to_dict(self):
+        """Convert model to dictionary for JSON serialization"""
+        return {
+            "id": self.id,
+            "filename": self.filename,
+            "topic_id": self.topic_id,
+            "topic_name": self.topic_name,
+            "updated": self.updated_at.strftime('%Y-%m-%d %H:%M'),
+            "tags": self.tags.split(",") if self.tags else [],
+            "content_hash": self.content_hash
+        }
+
+class Run(db.Model):
+    """Phase timeline of a scheduled update or manual search
+    
+    The timeline is stored as compact JSON: a list of topics, each with its
+    start and end, outcome and a list of [phase, start, end, outcome] spans.
+    Times are milliseconds since the start of the run, to 0.1 ms.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    trigger = db.Column(db.String(20), nullable=False)  # scheduled, manual
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.now, index=True)
+    duration = db.Column(db.Integer, nullable=False, default=0)  # Milliseconds
+    topic_count = db.Column(db.Integer, nullable=False, default=0)
+    error_count = db.Column(db.Integer, nullable=False, default=0)
+    phase_totals = db.Column(db.Text, nullable=True)  # JSON object: phase -> total milliseconds
+    timeline = db.Column(db.Text, nullable=True)
+    
+    def to_dict(self, include_timeline=False):
+        """Convert model to dictionary for JSON serialization
+        
+        Args:
+            include_timeline (bool, optional): Include the per-topic spans.
+                Defaults to False.
+        """
+        data = {
+            "id": self.id,
+            "trigger": self.trigger,
+            "started_at": self.started_at.isoformat(),
+            "duration": self.duration,
+            "topic_count": self.topic_count,
+            "error_count": self.error_count,
+            "phase_totals": json.loads(self.phase_totals) if self.phase_totals else {}
+        }
+        if include_timeline:
+            data["topics"] = [
+                dict(topic, spans=[
+                    {"phase": phase, "start": start, "end": end, "outcome": outcome}
+                    for phase, start, end, outcome in topic["spans"]
+                ])
+                for topic in (json.loads(self.timeline) if self.timeline else [])
+            ]
+        return data
+
+class JournalStat(db.Model):
+    """Running journal aggregates, kept up to date as entries are written
+    
+    Rows are keyed by kind and key: ('total', '') counts entries, ('topic', name)
+    counts entries per topic and ('tag', tag) counts tag occurrences.
+    """
+    kind = db.Column(db.String(20), primary_key=True)
+    key = db.Column(db.String(255), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    @classmethod
+    def adjust(cls, kind, key, delta):
+        """Atomically add delta to an aggregate in the current transaction
+        
+        Uses an ON CONFLICT upsert on SQLite and PostgreSQL, and an update
+        followed by an insert when the row is missing on other databases.
+        """
+        insert = UPSERT_INSERTS.get(db.engine.dialect.name)
+        if insert is not None:
+            statement = insert(cls).values(kind=kind, key=key, count=delta)
+            statement = statement.on_conflict_do_update(
+                index_elements=[cls.kind, cls.key],
+                set_={"count": cls.count + delta}
+            )
+            db.session.execute(statement)
+            return
+        
+        update = db.update(cls).where(cls.kind == kind, cls.key == key).values(count=cls.count + delta)
+        if db.session.execute(update).rowcount:
+            return
+        try:
+            with db.session.begin_nested():
+                db.session.execute(db.insert(cls).values(kind=kind, key=key, count=delta))
+        except IntegrityError:
+            # Another transaction inserted the row first
+            db.session.execute(update)
@@ -0,0 +1,48 @@
+"""Import the hyphenated backend files under their module names
+
+The backend modules import each other as models, scheduler, perplexity_api
+and so on, while the files in the repository are named models-py.py,
+scheduler-py.py, perplexity-api.py and so on. Tests and benchmarks install
+this finder to run against the files as they are. It comes after the regular
+import machinery, so files that were renamed for deployment are used as they are.
+"""
+import importlib.abc
+import importlib.util
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def module_name(filename):
+    """Get the name a backend file is imported under, e.g. models-py.py -> models"""
+    stem = filename[:-len(".py")]
+    if stem.endswith("-py"):
+        stem = stem[:-len("-py")]
+    return stem.replace("-", "_")
+
+class BackendFinder(importlib.abc.MetaPathFinder):
+    """Finds the hyphenated files of a directory by their module names"""
+
+    def __init__(self, directory):
+        self.modules = {
+            module_name(filename): os.path.join(directory, filename)
+            for filename in os.listdir(directory)
+            if filename.endswith(".py") and "-" in filename
+        }
+
+    def find_spec(self, name, path=None, target=None):
+        filepath = self.modules.get(name)
+        if filepath is None:
+            return None
+        return importlib.util.spec_from_file_location(name, filepath)
+
+def install(directory=BACKEND_DIR):
+    """Make the backend modules importable
+
+    Args:
+        directory (str, optional): Backend directory. Defaults to this file's directory.
+    """
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    if not any(isinstance(finder, BackendFinder) for finder in sys.meta_path):
+        sys.meta_path.append(BackendFinder(directory))
@@ -1,12 +1,55 @@
 import requests
+import asyncio
 import json
 import time
 import logging
 import re
 from datetime import datetime
+from ledger import UsageLedger
+from metrics import counter, histogram
+from timeline import span, add_span
+from transport import PooledTransport
+from rate_limiter import TokenBucket, backoff_delay, parse_retry_after
+
+try:
+    import aiohttp
+except ImportError:  # Optional, only needed for AsyncPerplexityAPIManager
+    aiohttp = None
 
 logger = logging.getLogger(__name__)
 
+PERPLEXITY_BASE_URL = "https://api.perplexity.ai"
+
+# Prices in USD: "input"/"output" per million tokens, "request" per API call
+DEFAULT_PRICING = {
+    "sonar": {"input": 1.0, "output": 1.0, "request": 0.005},
+    "sonar-pro": {"input": 3.0, "output": 15.0, "request": 0.006},
+    "sonar-reasoning": {"input": 1.0, "output": 5.0, "request": 0.005},
+    "sonar-reasoning-pro": {"input": 2.0, "output": 8.0, "request": 0.006}
+}
+
+REQUEST_SECONDS = histogram(
+    "perplexity_request_duration_seconds",
+    "Duration of Perplexity API calls, including reading streamed answers",
+    ("model", "status"),
+    buckets=(0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+)
+RETRIES = counter(
+    "perplexity_retries_total",
+    "Perplexity API calls retried, by reason (rate_limited or network)",
+    ("model", "reason")
+)
+RATE_LIMITED = counter(
+    "perplexity_rate_limited_total",
+    "Perplexity API answers with HTTP 429",
+    ("model",)
+)
+
+DEFAULT_SYSTEM_MESSAGE = (
+    "You are a research assistant. Provide comprehensive answers with citations "
+    "to reliable sources. Be factual, objective, and thorough."
+)
+
 class PerplexityAPIManager:
     """Manager for Perplexity API interactions
     
@@ -14,35 +57,147 @@ class PerplexityAPIManager:
     and response processing.
     """
     
-    def __init__(self, api_key, daily_budget=5.0):
+    max_retries = 3
+    backoff_factor = 1.5
+    
+    def __init__(self, api_key, daily_budget=5.0, pool_size=10, connect_timeout=5.0,
+                 read_timeout=30.0, cache=None, requests_per_minute=50, burst=5,
+                 pricing=None, ledger=None, base_url=PERPLEXITY_BASE_URL):
         """Initialize the Perplexity API Manager
         
         Args:
             api_key (str): Perplexity API key
             daily_budget (float, optional): Maximum daily budget for API calls. Defaults to 5.0.
+            pool_size (int, optional): Number of keep-alive connections to the API.
+                Defaults to 10.
+            connect_timeout (float, optional): Connect timeout in seconds. Defaults to 5.0.
+            read_timeout (float, optional): Read timeout in seconds. Defaults to 30.0.
+            cache (ResponseCache, optional): Cache consulted before making API calls.
+                Defaults to None (no caching).
+            requests_per_minute (float, optional): Request rate the shared rate
+                limiter paces calls to. Defaults to 50.
+            burst (int, optional): Number of requests allowed back to back.
+                Defaults to 5.
+            pricing (dict, optional): Per-model prices overriding DEFAULT_PRICING.
+                Defaults to None.
+            ledger (UsageLedger, optional): Ledger holding usage counters, shared
+                with other processes using the same file. Defaults to None, in
+                which case counters are private to this manager.
+            base_url (str, optional): Base URL of the API, e.g. a local stand-in
+                for benchmarks. Defaults to PERPLEXITY_BASE_URL.
         """
         self.api_key = api_key
+        self.api_url = base_url.rstrip("/") + "/chat/completions"
         self.daily_budget = daily_budget
-        self.daily_usage = 0
-        self.request_count = 0
-        self.last_reset = time.time()
         self.reset_interval = 86400  # 24 hours in seconds
+        self.ledger = ledger or UsageLedger(":memory:")
+        self.pricing = dict(DEFAULT_PRICING, **(pricing or {}))
+        self.cache = cache
+        self.rate_limiter = TokenBucket(rate=requests_per_minute / 60.0, capacity=burst)
+        self.transport = PooledTransport(
+            headers=self._build_headers(),
+            pool_size=pool_size,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout
+        )
+    
+    def _period_key(self, counter):
+        """Ledger key of a counter for the current budget period
+        
+        Periods are fixed windows of reset_interval seconds, so every process
+        sharing the ledger agrees on when the budget resets.
+        """
+        return f"{counter}:{int(time.time() // self.reset_interval)}"
+    
+    @property
+    def daily_usage(self):
+        """float: USD spent in the current budget period"""
+        return self.ledger.get(self._period_key("usage"))
+    
+    @property
+    def request_count(self):
+        """int: Successful API calls in the current budget period"""
+        return int(self.ledger.get(self._period_key("requests")))
+    
+    @property
+    def last_reset(self):
+        """float: Timestamp at which the current budget period started"""
+        return time.time() // self.reset_interval * self.reset_interval
+    
+    def calls_this_month(self):
+        """Get the number of successful API calls made this calendar month
+        
+        Returns:
+            int: API call count
+        """
+        return int(self.ledger.get(f"calls:{datetime.now():%Y-%m}"))
     
     def check_budget(self):
-        """Check if current usage is within budget, reset if needed
+        """Check if current usage is within budget
+        
+        Usage resets automatically when a new budget period starts.
         
         Returns:
             bool: True if within budget, False if exceeded
         """
-        current_time = time.time()
-        if current_time - self.last_reset >= self.reset_interval:
-            self.daily_usage = 0
-            self.last_reset = current_time
-            return True
-        
         return self.daily_usage < self.daily_budget
     
-    def query(self, query_text, model="sonar", system_message=None, max_tokens=1000):
+    def remaining_budget(self):
+        """Get the budget left for the current period
+        
+        Returns:
+            float: Remaining budget in USD (never negative)
+        """
+        return max(0.0, self.daily_budget - self.daily_usage)
+    
+    def _model_pricing(self, model):
+        """Look up the price entry for a model, falling back to sonar pricing"""
+        if model not in self.pricing:
+            logger.warning(f"No pricing configured for model {model}, using sonar pricing")
+        return self.pricing.get(model, self.pricing["sonar"])
+    
+    def calculate_cost(self, model, usage):
+        """Calculate the cost of a call from its token usage
+        
+        Args:
+            model (str): Model that served the request
+            usage (dict): The "usage" block of the raw API response
+            
+        Returns:
+            float: Cost in USD
+        """
+        price = self._model_pricing(model)
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        return (
+            prompt_tokens * price["input"] / 1_000_000
+            + completion_tokens * price["output"] / 1_000_000
+            + price["request"]
+        )
+    
+    def estimate_cost(self, query_text, model="sonar", system_message=None, max_tokens=1000):
+        """Estimate the worst-case cost of a query before it is made
+        
+        Prompt tokens are approximated as four characters per token and the
+        completion is assumed to use all of max_tokens.
+        
+        Args:
+            query_text (str): The search query text
+            model (str, optional): Perplexity model to use. Defaults to "sonar".
+            system_message (str, optional): System message. Defaults to None.
+            max_tokens (int, optional): Maximum tokens in response. Defaults to 1000.
+            
+        Returns:
+            float: Estimated cost in USD
+        """
+        prompt = (system_message or DEFAULT_SYSTEM_MESSAGE) + query_text
+        return self.calculate_cost(model, {
+            "prompt_tokens": len(prompt) // 4 + 1,
+            "completion_tokens": max_tokens
+        })
+    
+    def query(self, query_text, model="sonar", system_message=None, max_tokens=1000, on_chunk=None,
+              refresh=False):
         """Make a query to the Perplexity API
         
         Args:
@@ -51,28 +206,172 @@ class PerplexityAPIManager:
             system_message (str, optional): System message to guide the response.
                 Defaults to None.
             max_tokens (int, optional): Maximum tokens in response. Defaults to 1000.
+            on_chunk (callable, optional): If given, the completion is streamed
+                and on_chunk(delta, content) is called for every received piece,
+                with content being the full text received so far. A retried
+                stream starts again from empty content. Defaults to None (wait
+                for the complete response).
+            refresh (bool, optional): Ignore any cached answer and replace it
+                with a fresh one. Defaults to False.
         
         Returns:
             dict: API response data or error information
         """
+        data = self._build_payload(query_text, model, system_message, max_tokens)
+        
+        # Cache hits skip both the network and the budget charge
+        cache_key, cached = self._lookup_cache(data, refresh)
+        if cached is not None:
+            if on_chunk is not None:
+                self._emit_chunk(on_chunk, cached["content"], cached["content"])
+            return cached
+        
         if not self.check_budget():
             logger.warning("Budget limit reached")
             return {"error": "Budget limit reached"}
         
-        # Use default system message if none provided
-        if system_message is None:
-            system_message = (
-                "You are a research assistant. Provide comprehensive answers with citations "
-                "to reliable sources. Be factual, objective, and thorough."
-            )
+        stream = on_chunk is not None
+        if stream:
+            data = dict(data, stream=True)
+        
+        # Make the API call with retry logic
+        for attempt in range(self.max_retries):
+            with span("rate_limit"):
+                self.rate_limiter.acquire()
+            logger.info(f"Making Perplexity API call: {query_text[:50]}...")
+            started, finished = time.perf_counter(), None
+            status = "exception"
+            try:
+                response = self.transport.post(self.api_url, json=data, stream=stream)
+                status = response.status_code
+                
+                with response:
+                    if response.status_code == 200:
+                        result = self._read_stream(response, on_chunk) if stream else response.json()
+                        self.rate_limiter.reward()
+                        return self._store_cache(cache_key, self._handle_success(result, data))
+                    elif response.status_code == 429:
+                        # Rate limit exceeded; the limiter delays every caller's next request
+                        self._count_rate_limited(model, attempt)
+                        self.rate_limiter.penalize(
+                            parse_retry_after(response.headers.get("Retry-After")),
+                            attempt,
+                            self.backoff_factor
+                        )
+                    else:
+                        error_info = f"API Error: {response.status_code}: {response.text}"
+                        logger.error(error_info)
+                        return {"error": error_info}
+            
+            except requests.exceptions.RequestException as e:
+                finished = time.perf_counter()  # Backoff is not part of the call
+                logger.error(f"Request error: {e}")
+                wait_time = backoff_delay(attempt, self.backoff_factor)
+                
+                if attempt < self.max_retries - 1:
+                    RETRIES.inc(model=model, reason="network")
+                    logger.info(f"Retrying in {wait_time:.1f} seconds...")
+                    with span("retry"):
+                        time.sleep(wait_time)
+                else:
+                    return {"error": f"Max retries exceeded: {str(e)}"}
+            
+            finally:
+                finished = finished or time.perf_counter()
+                REQUEST_SECONDS.observe(finished - started, model=model, status=status)
+                add_span("api", started, finished, status)
+        
+        return {"error": "Failed to get response after retries"}
+    
+    def _count_rate_limited(self, model, attempt):
+        """Count a 429 answer, and the retry it causes unless attempts are used up"""
+        RATE_LIMITED.inc(model=model)
+        if attempt < self.max_retries - 1:
+            RETRIES.inc(model=model, reason="rate_limited")
+    
+    def _read_stream(self, response, on_chunk):
+        """Consume a streamed chat completion
+        
+        Reads the server-sent events of the response as they arrive, passing
+        each content delta to on_chunk.
+        
+        Args:
+            response (requests.Response): Streaming HTTP response
+            on_chunk (callable): Called with (delta, content so far)
+            
+        Returns:
+            dict: The completion in the format of a non-streaming response
+        """
+        if response.encoding is None:
+            response.encoding = "utf-8"
         
-        # Prepare the API request
-        headers = {
+        content = ""
+        last = {}
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            
+            payload = line[5:].strip()
+            if payload == "[DONE]":
+                # Keep reading to the end of the body so the connection can be reused
+                continue
+            
+            try:
+                chunk = json.loads(payload)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping malformed stream event: {payload[:100]}")
+                continue
+            
+            last = chunk
+            choices = chunk.get("choices") or [{}]
+            delta = (choices[0].get("delta") or {}).get("content")
+            if delta:
+                content += delta
+                self._emit_chunk(on_chunk, delta, content)
+        
+        # The final event carries the id, model and token usage
+        return {
+            "id": last.get("id"),
+            "model": last.get("model"),
+            "choices": [{"message": {"role": "assistant", "content": content}}],
+            "usage": last.get("usage")
+        }
+    
+    def _emit_chunk(self, on_chunk, delta, content):
+        """Pass a streamed piece to the caller's callback, logging its errors"""
+        try:
+            on_chunk(delta, content)
+        except Exception as e:
+            logger.error(f"Stream callback failed: {e}")
+    
+    def _build_headers(self):
+        """Build the HTTP headers for an API request
+        
+        Returns:
+            dict: Request headers
+        """
+        return {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+    
+    def _build_payload(self, query_text, model, system_message, max_tokens):
+        """Build the JSON body for a chat completions request
         
-        data = {
+        Args:
+            query_text (str): The search query text
+            model (str): Perplexity model to use
+            system_message (str): System message, or None for the default
+            max_tokens (int): Maximum tokens in response
+            
+        Returns:
+            dict: Request payload
+        """
+        # Use default system message if none provided
+        if system_message is None:
+            system_message = DEFAULT_SYSTEM_MESSAGE
+        
+        return {
             "model": model,
             "messages": [
                 {
@@ -88,52 +387,86 @@ class PerplexityAPIManager:
             "temperature": 0.5,
             "top_p": 0.9
         }
+    
+    def _lookup_cache(self, data, refresh=False):
+        """Look up a request payload in the response cache
         
-        # Make the API call with retry logic
-        max_retries = 3
-        backoff_factor = 1.5
+        Args:
+            data (dict): Request payload from _build_payload
+            refresh (bool, optional): Only build the key, so that a fresh
+                answer replaces the cached one. Defaults to False.
+            
+        Returns:
+            tuple: (cache key, cached response). Both are None when caching is
+                disabled; the response is None on a cache miss.
+        """
+        if self.cache is None:
+            return None, None
+        
+        cache_key = self.cache.make_key(
+            data["model"],
+            data["messages"][0]["content"],
+            data["messages"][1]["content"],
+            data["max_tokens"]
+        )
+        if refresh:
+            return cache_key, None
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Cache hit for query: {data['messages'][1]['content'][:50]}...")
+            cached.update(cost=0.0, cached=True)
+        return cache_key, cached
+    
+    def _store_cache(self, cache_key, processed):
+        """Store a processed response in the cache unless it is an error
         
-        for attempt in range(max_retries):
+        Args:
+            cache_key (str): Key from _lookup_cache, or None if caching is disabled
+            processed (dict): Output of _process_response
+            
+        Returns:
+            dict: The processed response, unchanged
+        """
+        if cache_key is not None and "error" not in processed:
             try:
-                logger.info(f"Making Perplexity API call: {query_text[:50]}...")
-                response = requests.post(
-                    "https://api.perplexity.ai/chat/completions",
-                    headers=headers,
-                    json=data,
-                    timeout=30
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    self.request_count += 1
-                    
-                    # Update estimated usage (simple estimate, adjust based on actual billing)
-                    # Assuming approximately $0.01 per request for simple calculation
-                    self.daily_usage += 0.01
-                    
-                    logger.info(f"API call successful: {self.request_count} calls made today")
-                    return self._process_response(result)
-                elif response.status_code == 429:
-                    # Rate limit exceeded
-                    logger.warning("Rate limit exceeded, backing off...")
-                    wait_time = backoff_factor ** attempt
-                    time.sleep(wait_time)
-                else:
-                    error_info = f"API Error: {response.status_code}: {response.text}"
-                    logger.error(error_info)
-                    return {"error": error_info}
+                self.cache.set(cache_key, processed)
+            except Exception as e:
+                logger.error(f"Failed to cache response: {e}")
+        return processed
+    
+    def _handle_success(self, result, data):
+        """Charge a successful call to the budget and process its response
+        
+        Args:
+            result (dict): Raw API response
+            data (dict): Request payload the response answers
             
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Request error: {e}")
-                wait_time = backoff_factor ** attempt
-                
-                if attempt < max_retries - 1:
-                    logger.info(f"Retrying in {wait_time} seconds...")
-                    time.sleep(wait_time)
-                else:
-                    return {"error": f"Max retries exceeded: {str(e)}"}
+        Returns:
+            dict: Processed response including "usage" and "cost"
+        """
+        usage = result.get("usage")
+        model = result.get("model") or data["model"]
+        if usage:
+            cost = self.calculate_cost(model, usage)
+        else:
+            # No usage reported, charge the worst case for this request
+            cost = self.estimate_cost(
+                data["messages"][1]["content"],
+                data["model"],
+                data["messages"][0]["content"],
+                data["max_tokens"]
+            )
         
-        return {"error": "Failed to get response after retries"}
+        self.ledger.increment(self._period_key("usage"), cost)
+        self.ledger.increment(self._period_key("requests"))
+        self.ledger.increment(f"calls:{datetime.now():%Y-%m}")
+        
+        logger.info(f"API call successful (${cost:.4f}): {self.request_count} calls made today")
+        
+        processed = self._process_response(result)
+        if "error" not in processed:
+            processed.update(usage=usage, cost=cost, cached=False)
+        return processed
     
     def _process_response(self, response):
         """Process and extract relevant information from API response
@@ -199,5 +532,154 @@ class PerplexityAPIManager:
             "request_count": self.request_count,
             "daily_usage": self.daily_usage,
             "daily_budget": self.daily_budget,
-            "last_reset": datetime.fromtimestamp(self.last_reset).isoformat()
+            "remaining_budget": self.remaining_budget(),
+            "calls_this_month": self.calls_this_month(),
+            "last_reset": datetime.fromtimestamp(self.last_reset).isoformat(),
+            "ledger": self.ledger.get_stats(),
+            "transport": self.transport.get_stats(),
+            "rate_limiter": self.rate_limiter.get_stats(),
+            "cache": self.cache.get_stats() if self.cache else None
         }
+
+
+class AsyncPerplexityAPIManager(PerplexityAPIManager):
+    """Asyncio-native manager for Perplexity API interactions
+    
+    Shares budget checks, retry semantics and response processing with
+    PerplexityAPIManager, but performs the HTTP calls with aiohttp so that
+    many queries can be in flight from a single event loop.
+    """
+    
+    def __init__(self, api_key, daily_budget=5.0, max_concurrency=10, **transport_options):
+        """Initialize the async Perplexity API Manager
+        
+        Args:
+            api_key (str): Perplexity API key
+            daily_budget (float, optional): Maximum daily budget for API calls. Defaults to 5.0.
+            max_concurrency (int, optional): Default limit on concurrent requests
+                made by query_many. Defaults to 10.
+            **transport_options: Pool size, timeouts and the other options of
+                PerplexityAPIManager
+        """
+        if aiohttp is None:
+            raise RuntimeError("aiohttp is required for AsyncPerplexityAPIManager")
+        
+        super().__init__(api_key, daily_budget, **transport_options)
+        self.max_concurrency = max_concurrency
+    
+    def _client_session(self):
+        """Create an aiohttp session using the manager's pool and timeout settings"""
+        return aiohttp.ClientSession(
+            headers=self._build_headers(),
+            connector=aiohttp.TCPConnector(limit=self.transport.pool_size),
+            timeout=aiohttp.ClientTimeout(
+                sock_connect=self.transport.connect_timeout,
+                sock_read=self.transport.read_timeout
+            )
+        )
+    
+    async def aquery(self, query_text, model="sonar", system_message=None, max_tokens=1000,
+                     session=None, refresh=False):
+        """Make a query to the Perplexity API without blocking the event loop
+        
+        Args:
+            query_text (str): The search query text
+            model (str, optional): Perplexity model to use. Defaults to "sonar".
+            system_message (str, optional): System message to guide the response.
+                Defaults to None.
+            max_tokens (int, optional): Maximum tokens in response. Defaults to 1000.
+            session (aiohttp.ClientSession, optional): Session to send the request
+                with. A temporary session is used if not provided.
+            refresh (bool, optional): Ignore any cached answer and replace it
+                with a fresh one. Defaults to False.
+        
+        Returns:
+            dict: API response data or error information
+        """
+        if session is None:
+            async with self._client_session() as session:
+                return await self.aquery(query_text, model, system_message, max_tokens, session, refresh)
+        
+        data = self._build_payload(query_text, model, system_message, max_tokens)
+        
+        # Cache hits skip both the network and the budget charge
+        cache_key, cached = self._lookup_cache(data, refresh)
+        if cached is not None:
+            return cached
+        
+        if not self.check_budget():
+            logger.warning("Budget limit reached")
+            return {"error": "Budget limit reached"}
+        
+        # Make the API call with retry logic
+        for attempt in range(self.max_retries):
+            with span("rate_limit"):
+                await self.rate_limiter.acquire_async()
+            logger.info(f"Making async Perplexity API call: {query_text[:50]}...")
+            started, finished = time.perf_counter(), None
+            status = "exception"
+            try:
+                async with session.post(self.api_url, json=data) as response:
+                    status = response.status
+                    if response.status == 200:
+                        result = await response.json()
+                        self.rate_limiter.reward()
+                        return self._store_cache(cache_key, self._handle_success(result, data))
+                    elif response.status == 429:
+                        # Rate limit exceeded; the limiter delays every caller's next request
+                        self._count_rate_limited(model, attempt)
+                        self.rate_limiter.penalize(
+                            parse_retry_after(response.headers.get("Retry-After")),
+                            attempt,
+                            self.backoff_factor
+                        )
+                    else:
+                        error_info = f"API Error: {response.status}: {await response.text()}"
+                        logger.error(error_info)
+                        return {"error": error_info}
+            
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                finished = time.perf_counter()  # Backoff is not part of the call
+                logger.error(f"Request error: {e!r}")
+                wait_time = backoff_delay(attempt, self.backoff_factor)
+                
+                if attempt < self.max_retries - 1:
+                    RETRIES.inc(model=model, reason="network")
+                    logger.info(f"Retrying in {wait_time:.1f} seconds...")
+                    with span("retry"):
+                        await asyncio.sleep(wait_time)
+                else:
+                    return {"error": f"Max retries exceeded: {e!r}"}
+            
+            finally:
+                finished = finished or time.perf_counter()
+                REQUEST_SECONDS.observe(finished - started, model=model, status=status)
+                add_span("api", started, finished, status)
+        
+        return {"error": "Failed to get response after retries"}
+    
+    async def query_many(self, queries, max_concurrency=None):
+        """Run many queries concurrently and return the results in order
+        
+        Args:
+            queries (list): Query texts, or dicts of keyword arguments for aquery
+                (query_text, model, system_message, max_tokens)
+            max_concurrency (int, optional): Maximum number of requests in flight.
+                Defaults to the manager's max_concurrency.
+        
+        Returns:
+            list: One result dict per query, in the same order as the input
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+        
+        async with self._client_session() as session:
+            async def run(query):
+                kwargs = query if isinstance(query, dict) else {"query_text": query}
+                async with semaphore:
+                    try:
+                        return await self.aquery(session=session, **kwargs)
+                    except Exception as e:
+                        logger.error(f"Unexpected error in batched query: {e!r}")
+                        return {"error": f"Unexpected error: {e!r}"}
+            
+            return await asyncio.gather(*(run(query) for query in queries))
@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+logger = logging.getLogger(__name__)
+
+def parse_retry_after(value):
+    """Parse a Retry-After header value
+
+    Args:
+        value (str): Header value, either delta-seconds or an HTTP date
+
+    Returns:
+        float: Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring invalid Retry-After header: {value}")
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+def backoff_delay(attempt, backoff_factor=1.5, jitter=0.25):
+    """Exponential backoff delay with random jitter
+
+    Args:
+        attempt (int): Zero-based retry attempt
+        backoff_factor (float, optional): Base of the exponential. Defaults to 1.5.
+        jitter (float, optional): Maximum fraction added at random. Defaults to 0.25.
+
+    Returns:
+        float: Seconds to wait
+    """
+    return backoff_factor ** attempt * (1 + random.uniform(0, jitter))
+
+class TokenBucket:
+    """Thread-safe token bucket that paces outgoing requests
+
+    Callers take a token before each request and wait when none is left.
+    A 429 with a Retry-After value blocks every caller until it has passed
+    and trims the refill rate slightly; a 429 without one halves the rate.
+    The rate recovers gradually after successful calls.
+    """
+
+    def __init__(self, rate=1.0, capacity=5, min_rate=0.05, jitter=0.25):
+        """Initialize the token bucket
+
+        Args:
+            rate (float, optional): Maximum tokens added per second. Defaults to 1.0.
+            capacity (int, optional): Maximum burst size. Defaults to 5.
+            min_rate (float, optional): Lowest rate reached after repeated 429s.
+                Defaults to 0.05.
+            jitter (float, optional): Maximum fraction of random jitter added to
+                waits caused by 429 responses. Defaults to 0.25.
+        """
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.capacity = capacity
+        self.jitter = jitter
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.throttled = 0
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)  # Notified when a 429 extends the block
+
+    def _refill(self, now):
+        """Add the tokens earned since the last update (caller holds the lock)"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _wait_time(self, now):
+        """Seconds until a token is available (caller holds the lock)"""
+        deficit = max(0.0, -self.tokens)
+        return max(deficit / self.rate, self.blocked_until - now)
+
+    def _take(self, now):
+        """Take a token and get the time its deficit is paid off (caller holds the lock)"""
+        self._refill(now)
+        self.tokens -= 1
+        return now + max(0.0, -self.tokens) / self.rate
+
+    def reserve(self):
+        """Take a token and report how long the caller must wait before using it
+
+        Returns:
+            float: Seconds to wait before sending the request
+        """
+        with self.lock:
+            now = time.monotonic()
+            self._take(now)
+            return self._wait_time(now)
+
+    def acquire(self):
+        """Take a token, blocking until the request may be sent
+
+        The wait ends once the token is paid off and no Retry-After block is
+        active. A 429 received while waiting extends the wait.
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        with self.changed:
+            started = time.monotonic()
+            ready_at = self._take(started)
+            while True:
+                now = time.monotonic()
+                wait = max(ready_at, self.blocked_until) - now
+                if wait <= 0:
+                    return now - started
+                self.changed.wait(wait)
+
+    async def acquire_async(self):
+        """Take a token, sleeping without blocking the event loop until the request may be sent
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        with self.lock:
+            started = time.monotonic()
+            ready_at = self._take(started)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                wait = max(ready_at, self.blocked_until) - now
+            if wait <= 0:
+                return now - started
+            await asyncio.sleep(wait)
+
+    def penalize(self, retry_after=None, attempt=0, backoff_factor=1.5):
+        """Slow down after a 429 response
+
+        Args:
+            retry_after (float, optional): Seconds from the Retry-After header.
+                Defaults to None, in which case exponential backoff is used and
+                the rate is halved; the server's wait already paces callers
+                when it is given, so the rate is only trimmed by a tenth.
+            attempt (int, optional): Zero-based retry attempt. Defaults to 0.
+            backoff_factor (float, optional): Base of the exponential backoff.
+                Defaults to 1.5.
+        """
+        if retry_after is None:
+            delay = backoff_delay(attempt, backoff_factor, self.jitter)
+            factor = 0.5
+        else:
+            delay = retry_after * (1 + random.uniform(0, self.jitter))
+            factor = 0.9
+
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate * factor)
+            self.tokens = min(self.tokens, 0.0)
+            self.blocked_until = max(self.blocked_until, now + delay)
+            self.throttled += 1
+            rate = self.rate
+            self.changed.notify_all()
+
+        logger.warning(f"Rate limited, pausing requests for {delay:.1f}s at {rate:.2f} req/s")
+
+    def reward(self):
+        """Recover part of the rate after a successful request"""
+        with self.lock:
+            if self.rate < self.max_rate:
+                now = time.monotonic()
+                self._refill(now)
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def get_stats(self):
+        """Get the current limiter state for monitoring
+
+        Returns:
+            dict: Token count, rates, expected wait and throttle count
+        """
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                "tokens": round(self.tokens, 3),
+                "capacity": self.capacity,
+                "rate": round(self.rate, 3),
+                "max_rate": self.max_rate,
+                "wait_time": round(max((1 - self.tokens) / self.rate, self.blocked_until - now, 0.0), 3),
+                "throttled": self.throttled
+            }
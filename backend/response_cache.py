@@ -0,0 +1,159 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """Persistent, content-addressed cache of processed API responses
+
+    Entries live in a SQLite file and are keyed on a hash of everything that
+    determines the answer (model, system message, query text and max_tokens).
+    Entries expire after a TTL, and the least recently used entries are
+    evicted once the cache grows past its size limit.
+    """
+
+    def __init__(self, path, ttl=86400, max_bytes=50 * 1024 * 1024):
+        """Initialize the response cache
+
+        Args:
+            path (str): Path of the SQLite cache file
+            ttl (int, optional): Seconds an entry stays valid. Defaults to 86400.
+            max_bytes (int, optional): Maximum total size of cached values.
+                Defaults to 50 MB.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_responses_accessed_at ON responses (accessed_at)"
+        )
+
+    @staticmethod
+    def make_key(model, system_message, query_text, max_tokens):
+        """Build the cache key for a query
+
+        Args:
+            model (str): Perplexity model
+            system_message (str): System message sent with the query
+            query_text (str): The search query text
+            max_tokens (int): Maximum tokens in response
+
+        Returns:
+            str: Hex digest identifying the query
+        """
+        material = json.dumps([model, system_message, query_text, max_tokens])
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Look up a cached response
+
+        Args:
+            key (str): Cache key from make_key
+
+        Returns:
+            dict: The cached response, or None on a miss
+        """
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or now - row[1] >= self.ttl:
+                if row is not None:
+                    self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+
+            self.conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        """Store a response, evicting old entries if the cache is full
+
+        Args:
+            key (str): Cache key from make_key
+            value (dict): JSON-serializable response
+        """
+        data = json.dumps(value)
+        size = len(data.encode('utf-8'))
+        if size > self.max_bytes:
+            logger.warning(f"Response of {size} bytes is larger than the cache, not caching")
+            return
+
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, data, size, now, now)
+            )
+            self._evict()
+
+    def _evict(self):
+        """Remove expired entries, then least recently used ones until under max_bytes"""
+        self.conn.execute("DELETE FROM responses WHERE created_at <= ?", (time.time() - self.ttl,))
+
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        victims = []
+        for key, size in self.conn.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+
+        self.conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    def clear(self):
+        """Remove every cached response"""
+        with self.lock:
+            self.conn.execute("DELETE FROM responses")
+
+    def get_stats(self):
+        """Get cache counters and size
+
+        Returns:
+            dict: Cache statistics
+        """
+        with self.lock:
+            entries, total = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": entries,
+                "size_bytes": total,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl
+            }
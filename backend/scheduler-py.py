@@ -1,30 +1,196 @@
+from apscheduler.executors.pool import ThreadPoolExecutor as JobExecutor
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.base import BaseTrigger
 from apscheduler.triggers.cron import CronTrigger
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-import threading
+import hashlib
 import logging
-from models import db, Topic, Schedule, Status, Log
+import threading
+import time
+from models import db, Topic, Schedule, Status, Log, Run, JournalEntry
+from job_queue import JobQueue
+from metrics import gauge, histogram
+from timeline import RunRecorder, span
+from journal_generator import ProgressiveRenderer, get_previous_entry, split_sections
 
 logger = logging.getLogger(__name__)
 
+FREQUENCIES = ('daily', 'weekly', 'monthly')
+
+REFRESH_MODES = ('full', 'delta')
+
+TOPICS_IN_FLIGHT = gauge(
+    "topics_in_flight",
+    "Topics currently being researched, by trigger (scheduled or manual)",
+    ("trigger",)
+)
+RUN_NOW_QUEUE_DEPTH = gauge(
+    "run_now_queue_depth",
+    "Manual searches waiting for a worker"
+)
+SCHEDULED_QUEUE_DEPTH = gauge(
+    "scheduled_topic_queue_depth",
+    "Topics of scheduled updates waiting for a worker"
+)
+SCHEDULED_RUN_SECONDS = histogram(
+    "scheduled_run_duration_seconds",
+    "Duration of scheduled updates",
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+)
+
+def build_trigger(frequency, time_of_day, cron=None):
+    """Build the trigger for a schedule
+    
+    Args:
+        frequency (str): daily, weekly (Mondays) or monthly (1st day)
+        time_of_day (str): Time of day in HH:MM format
+        cron (str, optional): Crontab expression that overrides frequency
+            and time of day
+        
+    Returns:
+        CronTrigger: Trigger for the schedule
+        
+    Raises:
+        ValueError: If the crontab expression is invalid
+    """
+    if cron:
+        return CronTrigger.from_crontab(cron)
+    
+    # Parse the time of day
+    try:
+        hour, minute = time_of_day.split(':')
+        hour, minute = int(hour), int(minute)
+    except (ValueError, AttributeError):
+        logger.error(f"Invalid time format: {time_of_day}")
+        hour, minute = 9, 0  # Default to 9:00 AM
+    
+    if frequency == 'weekly':
+        # Run weekly on Monday
+        return CronTrigger(day_of_week='mon', hour=hour, minute=minute)
+    
+    if frequency == 'monthly':
+        # Run monthly on the 1st
+        return CronTrigger(day=1, hour=hour, minute=minute)
+    
+    if frequency != 'daily':
+        # Default to daily if unrecognized frequency
+        logger.warning(f"Unrecognized frequency '{frequency}', defaulting to daily")
+    return CronTrigger(hour=hour, minute=minute)
+
+def validate_schedule(frequency=None, cron=None):
+    """Check per-topic schedule settings
+    
+    Args:
+        frequency (str, optional): Frequency, or None to use the global schedule
+        cron (str, optional): Crontab expression, or None
+        
+    Raises:
+        ValueError: If the frequency or crontab expression is invalid
+    """
+    if frequency is not None and frequency not in FREQUENCIES:
+        raise ValueError(f"Unsupported frequency: {frequency}")
+    if cron:
+        CronTrigger.from_crontab(cron)
+
+class OffsetTrigger(BaseTrigger):
+    """Trigger that fires a fixed time after every fire time of another trigger"""
+    
+    def __init__(self, trigger, offset):
+        """Initialize the trigger
+        
+        Args:
+            trigger: Trigger providing the base fire times
+            offset (timedelta): Delay added to every fire time
+        """
+        self.trigger = trigger
+        self.offset = offset
+    
+    def get_next_fire_time(self, previous_fire_time, now):
+        if previous_fire_time is not None:
+            previous_fire_time -= self.offset
+        fire_time = self.trigger.get_next_fire_time(previous_fire_time, now - self.offset)
+        return fire_time + self.offset if fire_time else None
+    
+    def __str__(self):
+        return f"{self.trigger} + {self.offset}"
+
 class SchedulerManager:
     """Manager for scheduling and running research updates
     
     Handles scheduling logic based on user preferences and executes
-    the Perplexity API searches at the appropriate times.
+    the Perplexity API searches at the appropriate times. Every topic
+    follows its own schedule or the global one, delayed by a stable
+    per-topic offset so that topics sharing a schedule do not all start in
+    the same minute. Topics that are due at the same time share one job,
+    so each batch is a single scheduled update, and all updates share one
+    pool of max_workers topic workers.
     """
     
-    def __init__(self, api_manager, journal_generator):
+    topic_max_tokens = 1500  # Completion limit for topic research queries
+    delta_max_tokens = 600  # Completion limit for delta refresh queries
+    partial_interval = 0.5  # Minimum seconds between partial content events per topic
+    spread_step = 60  # Granularity of spread offsets, so that topics share batches
+    sync_job_id = "sync-topics"
+    
+    def __init__(self, api_manager, journal_generator, max_workers=4, event_bus=None,
+                 manual_workers=2, manual_queue_size=20, spread_window=3600,
+                 stream_responses=True, delta_max_bytes=65536, sync_interval=300):
         """Initialize the scheduler manager
         
         Args:
             api_manager: Instance of PerplexityAPIManager
             journal_generator: Function to generate journal entries
+            max_workers (int, optional): Maximum number of topics processed
+                concurrently by scheduled updates. Defaults to 4.
+            event_bus (EventBus, optional): Bus that receives topic status and
+                next-run events. Defaults to None.
+            manual_workers (int, optional): Number of threads running manual
+                searches. Defaults to 2.
+            manual_queue_size (int, optional): Maximum number of queued manual
+                searches. Defaults to 20.
+            spread_window (int, optional): Seconds after the scheduled time
+                across which topic runs are spread. Defaults to 3600.
+            stream_responses (bool, optional): Stream API responses, rendering
+                complete sections and publishing partial content while the
+                answer arrives. Defaults to True.
+            delta_max_bytes (int, optional): Size of a delta topic's stored
+                markdown beyond which the next update is a full refresh that
+                replaces it. Defaults to 65536.
+            sync_interval (int, optional): Seconds between re-reads of all
+                topics, which schedule topics changed outside this process.
+                Defaults to 300.
         """
         self.api_manager = api_manager
         self.journal_generator = journal_generator
-        self.scheduler = BackgroundScheduler()
-        self.lock = threading.Lock()  # For thread safety
+        self.max_workers = max(1, int(max_workers))
+        self.event_bus = event_bus
+        self.spread_window = max(0, int(spread_window))
+        self.stream_responses = stream_responses
+        self.delta_max_bytes = delta_max_bytes
+        self.sync_interval = max(1, int(sync_interval))
+        # Topics of all scheduled updates run on one bounded pool
+        self.topic_executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="topic-worker"
+        )
+        self.jobs_lock = threading.Lock()
+        # Estimated cost of admitted topics that have not finished yet, so
+        # overlapping batches do not spend the same remaining budget
+        self.budget_lock = threading.Lock()
+        self.reserved_budget = 0.0
+        # Batches that are due together all start; late ones still run
+        self.scheduler = BackgroundScheduler(
+            executors={'default': JobExecutor(self.max_workers)},
+            job_defaults={'coalesce': True, 'misfire_grace_time': None}
+        )
+        self.job_queue = JobQueue(
+            self._run_single_topic_job,
+            workers=manual_workers,
+            max_size=manual_queue_size
+        )
+        RUN_NOW_QUEUE_DEPTH.set_function(self.job_queue.pending.qsize)
+        SCHEDULED_QUEUE_DEPTH.set_function(self.topic_executor._work_queue.qsize)
     
     def start_scheduler(self, app):
         """Start the scheduler with the current schedule settings
@@ -38,116 +204,285 @@ class SchedulerManager:
                 logger.error("No schedule settings found in database")
                 return
             
-            # Configure and start the scheduler
-            self._configure_scheduler(schedule, app)
-            
+            # Start the scheduler first so that new jobs get their next run time
             if not self.scheduler.running:
                 self.scheduler.start()
                 logger.info("Scheduler started successfully")
+            
+            self._configure_scheduler(schedule, app)
+            
+            # Topics imported from the command line or edited in the database
+            # directly are only seen by reading them again
+            self.scheduler.add_job(
+                self.sync_topics,
+                trigger='interval',
+                seconds=self.sync_interval,
+                args=[app],
+                id=self.sync_job_id,
+                replace_existing=True
+            )
     
     def _configure_scheduler(self, schedule, app):
-        """Configure the scheduler based on schedule settings
+        """Replace the scheduler's jobs with the batches of all topics
         
         Args:
             schedule: Schedule database model instance
             app: Flask application instance
         """
-        # Remove existing jobs
-        self.scheduler.remove_all_jobs()
+        topics = db.session.query(Topic).all()
+        self._sync_jobs(app, topics, schedule, rebuild=True)
+        logger.info(
+            f"Scheduled {len(topics)} topics in {len(self.batch_jobs())} batches "
+            f"({schedule.frequency} at {schedule.time_of_day} by default)"
+        )
+        
+        self._update_next_run_time()
+    
+    def sync_topics(self, app):
+        """Rebuild the batch jobs from the topics in the database
+        
+        Args:
+            app: Flask application instance
+        """
+        with app.app_context():
+            schedule = Schedule.query.first()
+            if not schedule:
+                logger.error("No schedule settings found in database")
+                return
+            
+            self._sync_jobs(app, db.session.query(Topic).all(), schedule, rebuild=True)
+            self._update_next_run_time()
+    
+    def batch_jobs(self):
+        """Get the scheduler jobs that run batches of topics
+        
+        Returns:
+            list: APScheduler jobs
+        """
+        return [job for job in self.scheduler.get_jobs() if job.id.startswith("batch-")]
+    
+    def _job_id(self, trigger):
+        """Get the scheduler job ID of the batch of topics due at a trigger's times"""
+        return "batch-" + hashlib.sha256(str(trigger).encode('utf-8')).hexdigest()[:16]
+    
+    def _spread_offset(self, topic_id):
+        """Get a topic's delay within the spread window
+        
+        The offset is derived from the topic ID, so it stays the same across
+        restarts and schedule changes. Offsets are whole multiples of
+        spread_step, so topics on the same schedule share batches.
+        
+        Args:
+            topic_id: ID of the topic
+            
+        Returns:
+            timedelta: Delay added to the topic's scheduled times
+        """
+        if not self.spread_window:
+            return timedelta(0)
+        
+        digest = hashlib.sha256(f"topic-{topic_id}".encode('utf-8')).digest()
+        value = int.from_bytes(digest[:8], 'big')
+        if self.spread_window < self.spread_step:
+            return timedelta(seconds=value % self.spread_window)
+        return timedelta(seconds=value % (self.spread_window // self.spread_step) * self.spread_step)
+    
+    def _topic_trigger(self, topic, schedule):
+        """Build the trigger of one topic
         
-        # Parse the time of day
+        Args:
+            topic: Topic database model instance
+            schedule: Global Schedule database model instance
+            
+        Returns:
+            OffsetTrigger: The topic's schedule delayed by its spread offset
+        """
+        frequency = topic.frequency or schedule.frequency
         try:
-            hour, minute = schedule.time_of_day.split(':')
-            hour, minute = int(hour), int(minute)
-        except (ValueError, AttributeError):
-            logger.error(f"Invalid time format: {schedule.time_of_day}")
-            hour, minute = 9, 0  # Default to 9:00 AM
-        
-        # Configure trigger based on frequency
-        if schedule.frequency == 'daily':
-            trigger = CronTrigger(hour=hour, minute=minute)
-            next_run = self._calculate_next_run(hour, minute)
-            logger.info(f"Scheduled daily update at {hour:02d}:{minute:02d}")
-        
-        elif schedule.frequency == 'weekly':
-            # Run weekly on Monday
-            trigger = CronTrigger(day_of_week='mon', hour=hour, minute=minute)
-            next_run = self._calculate_next_run(hour, minute, day_of_week=0)  # 0 = Monday
-            logger.info(f"Scheduled weekly update on Monday at {hour:02d}:{minute:02d}")
-        
-        elif schedule.frequency == 'monthly':
-            # Run monthly on the 1st
-            trigger = CronTrigger(day=1, hour=hour, minute=minute)
-            next_run = self._calculate_next_run(hour, minute, day=1)
-            logger.info(f"Scheduled monthly update on the 1st at {hour:02d}:{minute:02d}")
+            trigger = build_trigger(frequency, schedule.time_of_day, topic.cron)
+        except ValueError as e:
+            logger.error(f"Invalid cron expression for topic {topic.name}: {e}")
+            trigger = build_trigger(frequency, schedule.time_of_day)
+        return OffsetTrigger(trigger, self._spread_offset(topic.id))
+    
+    def _sync_jobs(self, app, topics, schedule=None, removed_ids=(), rebuild=False):
+        """Move topics into the batch jobs of their fire times
         
-        else:
-            # Default to daily if unrecognized frequency
-            trigger = CronTrigger(hour=hour, minute=minute)
-            next_run = self._calculate_next_run(hour, minute)
-            logger.warning(f"Unrecognized frequency '{schedule.frequency}', defaulting to daily")
-        
-        # Add job to the scheduler
-        self.scheduler.add_job(
-            self.run_scheduled_update,
-            trigger=trigger,
-            args=[app],
-            id='scheduled_update',
-            replace_existing=True
-        )
+        Every batch job runs one scheduled update over the IDs in its
+        topic_ids argument. Jobs left without topics are removed.
         
-        # Update next run time in database
-        with app.app_context():
-            status = Status.query.first()
-            if status:
-                status.next_run_time = next_run
-                db.session.commit()
-                logger.info(f"Updated next run time to {next_run}")
+        Args:
+            app: Flask application instance
+            topics: Created or edited Topic database model instances
+            schedule (optional): Global Schedule database model instance,
+                required when topics are given. Defaults to None.
+            removed_ids (iterable, optional): IDs of deleted topics. Defaults to ().
+            rebuild (bool, optional): Replace all jobs with the batches of the
+                given topics. Defaults to False.
+        """
+        with self.jobs_lock:
+            self._apply_batches(app, topics, schedule, removed_ids, rebuild)
+    
+    def _apply_batches(self, app, topics, schedule, removed_ids, rebuild):
+        """Update the batch jobs; called by _sync_jobs with the jobs lock held"""
+        jobs = {job.id: job for job in self.batch_jobs()}
+        changed = set(removed_ids) | {topic.id for topic in topics}
+        
+        # Current batches without the changed topics
+        batches = {}
+        if not rebuild:
+            for job_id, job in jobs.items():
+                batches[job_id] = [
+                    topic_id for topic_id in job.kwargs.get('topic_ids', ())
+                    if topic_id not in changed
+                ]
+        
+        triggers = {}
+        for topic in topics:
+            trigger = self._topic_trigger(topic, schedule)
+            job_id = self._job_id(trigger)
+            triggers[job_id] = trigger
+            batches.setdefault(job_id, []).append(topic.id)
+        
+        for job_id, job in jobs.items():
+            if not batches.get(job_id):
+                job.remove()
+        
+        for job_id, topic_ids in batches.items():
+            if not topic_ids:
+                continue
+            topic_ids = sorted(topic_ids)
+            job = jobs.get(job_id)
+            if job is None:
+                self.scheduler.add_job(
+                    self.run_scheduled_update,
+                    trigger=triggers[job_id],
+                    args=[app],
+                    kwargs={'topic_ids': topic_ids},
+                    id=job_id
+                )
+            elif job.kwargs.get('topic_ids') != topic_ids:
+                job.modify(kwargs={'topic_ids': topic_ids})
+    
+    def schedule_topic(self, app, topic):
+        """Add a created or edited topic to the batch of its fire times
+        
+        Args:
+            app: Flask application instance
+            topic: Topic database model instance
+        """
+        self.schedule_topics(app, [topic])
+    
+    def schedule_topics(self, app, topics):
+        """Add several created or edited topics to the batches of their fire times
+        
+        Args:
+            app: Flask application instance
+            topics: Topic database model instances
+        """
+        schedule = Schedule.query.first()
+        if not schedule:
+            logger.error("No schedule settings found in database")
+            return
+        
+        self._sync_jobs(app, topics, schedule)
+        self._update_next_run_time()
+    
+    def unschedule_topic(self, topic_id):
+        """Remove a deleted topic from its batch
+        
+        Args:
+            topic_id: ID of the deleted topic
+        """
+        self._sync_jobs(None, [], removed_ids=[topic_id])
+        self._update_next_run_time()
+    
+    def _update_next_run_time(self):
+        """Store the earliest next run time of all batch jobs in the status"""
+        next_runs = [
+            job.next_run_time for job in self.batch_jobs()
+            if getattr(job, 'next_run_time', None)
+        ]
+        # Stored as naive local time like the other timestamps
+        next_run = min(next_runs).astimezone().replace(tzinfo=None) if next_runs else None
+        
+        status = Status.query.first()
+        if status and status.next_run_time != next_run:
+            status.next_run_time = next_run
+            db.session.commit()
+            self._publish_next_run(next_run)
+            logger.info(f"Updated next run time to {next_run}")
+    
+    def _publish_topic_status(self, topic, filename=None):
+        """Publish a topic's committed status to the event bus
+        
+        Args:
+            topic: Topic database model instance
+            filename (str, optional): Journal entry written by the run; its
+                index row is included so that clients can update that entry
+                without reloading the journal. Defaults to None.
+        """
+        if self.event_bus is None:
+            return
+        
+        data = {
+            "topic_id": topic.id,
+            "name": topic.name,
+            "status": topic.status,
+            "last_updated": topic.last_updated.isoformat() if topic.last_updated else None
+        }
+        if filename:
+            entry = db.session.query(JournalEntry).filter_by(filename=filename).first()
+            if entry is not None:
+                data["journal_entry"] = entry.to_dict()
+        self.event_bus.publish("topic_status", data)
     
-    def _calculate_next_run(self, hour, minute, day=None, day_of_week=None):
-        """Calculate the next run time based on schedule parameters
+    def _partial_content_handler(self, topic):
+        """Build the stream callback for a topic's API call
+        
+        Complete sections are rendered while the rest of the answer is still
+        arriving, and the preview is published as topic_partial events at
+        most every partial_interval seconds.
         
         Args:
-            hour (int): Hour of day (0-23)
-            minute (int): Minute of hour (0-59)
-            day (int, optional): Day of month for monthly schedule
-            day_of_week (int, optional): Day of week for weekly schedule (0=Monday)
+            topic: Topic database model instance
             
         Returns:
-            datetime: Next scheduled run time
+            callable: Callback taking (delta, content so far)
+        """
+        renderer = ProgressiveRenderer()
+        topic_id = topic.id
+        last_published = 0.0
+        
+        def on_chunk(delta, content):
+            nonlocal last_published
+            now = time.monotonic()
+            if now - last_published < self.partial_interval:
+                return
+            last_published = now
+            
+            preview = renderer.feed(content)
+            if self.event_bus is not None:
+                self.event_bus.publish("topic_partial", {"topic_id": topic_id, "html": preview})
+        
+        return on_chunk
+    
+    def _publish_next_run(self, next_run):
+        """Publish a new next run time to the event bus
+        
+        Args:
+            next_run (datetime): Next scheduled run time, or None
         """
-        now = datetime.now()
-        next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-        
-        if next_run <= now:
-            # If the time is in the past, move to tomorrow
-            next_run += timedelta(days=1)
-        
-        if day is not None:
-            # For monthly schedule
-            if next_run.day != day:
-                # Move to the specified day in the current or next month
-                if next_run.day < day:
-                    # Later this month
-                    next_run = next_run.replace(day=day)
-                else:
-                    # Next month
-                    if next_run.month == 12:
-                        next_run = next_run.replace(year=next_run.year + 1, month=1, day=day)
-                    else:
-                        next_run = next_run.replace(month=next_run.month + 1, day=day)
-        
-        if day_of_week is not None:
-            # For weekly schedule
-            days_ahead = day_of_week - next_run.weekday()
-            if days_ahead <= 0:  # Target day already happened this week
-                days_ahead += 7
-            next_run += timedelta(days=days_ahead)
-        
-        return next_run
+        if self.event_bus is None:
+            return
+        
+        self.event_bus.publish("next_run", {"next_run_time": next_run.isoformat() if next_run else None})
     
     def update_schedule(self, app):
-        """Update the scheduler with new schedule settings
+        """Update the scheduler with new global schedule settings
+        
+        Only topics without their own cron expression follow the global
+        schedule, so the other topics stay in their batches.
         
         Args:
             app: Flask application instance
@@ -155,17 +490,22 @@ class SchedulerManager:
         with app.app_context():
             schedule = Schedule.query.first()
             if schedule:
-                self._configure_scheduler(schedule, app)
+                topics = db.session.query(Topic).filter(Topic.cron.is_(None)).all()
+                self._sync_jobs(app, topics, schedule)
+                self._update_next_run_time()
                 logger.info(f"Updated scheduler with new settings: {schedule.frequency} at {schedule.time_of_day}")
     
-    def run_scheduled_update(self, app):
-        """Run the scheduled update task for all topics
+    def run_scheduled_update(self, app, topic_ids=None):
+        """Run the scheduled update task
         
         Args:
             app: Flask application instance for database context
+            topic_ids (list, optional): IDs of the topics to update. Defaults
+                to None (all topics).
         """
         with app.app_context():
             logger.info("Starting scheduled update")
+            recorder = RunRecorder("scheduled")
             
             # Update the last run time
             status = Status.query.first()
@@ -173,167 +513,392 @@ class SchedulerManager:
                 status.last_run_time = datetime.now()
                 db.session.commit()
             
-            # Get all topics
-            topics = Topic.query.all()
+            try:
+                with SCHEDULED_RUN_SECONDS.time():
+                    self._run_topics(app, topic_ids, recorder)
+            finally:
+                self._save_run(recorder)
+                self._update_next_run_time()
+    
+    def _save_run(self, recorder):
+        """Store the timeline of a run that processed at least one topic
+        
+        Args:
+            recorder (RunRecorder): Recorder of the run
+        """
+        if not recorder.topics:
+            return
+        try:
+            db.session.add(Run(**recorder.as_row()))
+            db.session.commit()
+        except Exception as e:
+            logger.error(f"Error saving run timeline: {str(e)}")
+            db.session.rollback()
+    
+    def _run_topics(self, app, topic_ids, recorder):
+        """Process the topics of a scheduled update
+        
+        Args:
+            app: Flask application instance
+            topic_ids (list): IDs of the topics to update, or None for all topics
+            recorder (RunRecorder): Recorder of the topics' phase timelines
+        """
+        query = db.session.query(Topic)
+        if topic_ids is not None:
+            query = query.filter(Topic.id.in_(topic_ids))
+        topics = query.all()
+        
+        if not topics:
+            logger.warning("No topics found for scheduled update")
+            log = Log(
+                status="warning",
+                message="No topics found for scheduled update"
+            )
+            db.session.add(log)
+            db.session.commit()
+            return
+        
+        # Only admit as many topics as the remaining budget can pay for
+        admitted = self._admit_topics(topics)
+        if not admitted:
+            return
+        
+        # End the read transaction so the batch holds no connection while it waits
+        db.session.commit()
+        
+        # Fan the topics out over the shared worker pool
+        logger.info(f"Processing {len(admitted)} topics with up to {self.max_workers} workers")
+        futures = [
+            self.topic_executor.submit(self._process_topic_worker, app, topic_id, recorder, estimate)
+            for topic_id, estimate in admitted
+        ]
+        for future in as_completed(futures):
+            future.result()
+    
+    def _estimate_topic_cost(self, topic):
+        """Estimate the API cost of processing a topic
+        
+        Uses the topic's average cost from previous runs, or a worst-case
+        estimate from the prompt size and token limit for new topics.
+        
+        Args:
+            topic: Topic database model instance
             
-            if not topics:
-                logger.warning("No topics found for scheduled update")
-                log = Log(
-                    status="warning",
-                    message="No topics found for scheduled update"
-                )
-                db.session.add(log)
-                db.session.commit()
-                return
+        Returns:
+            float: Estimated cost in USD
+        """
+        average = topic.average_cost()
+        if average is not None:
+            return average
+        
+        return self.api_manager.estimate_cost(
+            topic.query,
+            system_message=self._system_message(topic),
+            max_tokens=self.topic_max_tokens
+        )
+    
+    def _admit_topics(self, topics):
+        """Choose the topics a scheduled update can afford
+        
+        Admits the cheapest topics first, which gives the largest number of
+        topics that fit in the remaining budget. The estimates of admitted
+        topics are reserved until each topic finishes, so that other batches
+        running at the same time only admit against what is left. Topics
+        that do not fit are deferred to the next run and recorded in the
+        activity log.
+        
+        Args:
+            topics: Topic database model instances
+            
+        Returns:
+            list: (topic ID, reserved estimate) of the admitted topics
+        """
+        estimates = sorted(
+            ((self._estimate_topic_cost(topic), topic) for topic in topics),
+            key=lambda item: item[0]
+        )
+        
+        admitted = []
+        committed = 0.0
+        with self.budget_lock:
+            remaining = max(0.0, self.api_manager.remaining_budget() - self.reserved_budget)
+            for estimate, topic in estimates:
+                if committed + estimate > remaining:
+                    break
+                admitted.append((topic.id, estimate))
+                committed += estimate
+            self.reserved_budget += committed
+        
+        deferred = len(topics) - len(admitted)
+        if deferred:
+            message = (
+                f"Deferred {deferred} of {len(topics)} topics: remaining budget "
+                f"${remaining:.2f} covers an estimated ${committed:.2f}"
+            )
+            logger.warning(message)
+            db.session.add(Log(status="warning", message=message))
+            db.session.commit()
+        
+        return admitted
+    
+    def _system_message(self, topic):
+        """Build the system message used for a topic's research query
+        
+        Args:
+            topic: Topic database model instance
             
-            # Process each topic
-            for topic in topics:
-                try:
-                    self._process_topic(topic, app)
-                except Exception as e:
-                    logger.error(f"Error processing topic {topic.name}: {str(e)}")
-                    log = Log(
-                        topic_id=topic.id,
-                        status="error",
-                        message=f"Error during scheduled update: {str(e)}"
-                    )
-                    db.session.add(log)
-                    db.session.commit()
+        Returns:
+            str: System message
+        """
+        return (
+            f"You are a research assistant specializing in {topic.name}. "
+            f"Provide a comprehensive summary of the latest developments, research, "
+            f"and important information on this topic. Include citations to reliable "
+            f"sources. Be factual, objective, and thorough."
+        )
+    
+    def _delta_system_message(self, topic, previous_markdown):
+        """Build the system message for a delta refresh of a topic
+        
+        Asks only for developments since the topic's last successful run,
+        organized under the previous entry's section headings so they can be
+        merged into it.
+        
+        Args:
+            topic: Topic database model instance
+            previous_markdown (str): Markdown of the previous entry
             
-            # Calculate next run time
-            schedule = Schedule.query.first()
-            if schedule and status:
-                next_run = self._calculate_next_run(
-                    *map(int, schedule.time_of_day.split(':'))
-                )
-                status.next_run_time = next_run
-                db.session.commit()
-                logger.info(f"Next scheduled update: {next_run}")
+        Returns:
+            str: System message
+        """
+        headings = [heading for heading, _ in split_sections(previous_markdown) if heading]
+        since = topic.last_updated.strftime('%B %d, %Y')
+        message = (
+            f"You are a research assistant specializing in {topic.name}. "
+            f"Report only developments, research and news published since {since}; "
+            f"do not repeat earlier background. Group them under '## ' headings"
+        )
+        if headings:
+            message += f", reusing these existing headings where they fit: {'; '.join(headings)}"
+        return message + (
+            ". Include citations to reliable sources. Be factual and concise. "
+            "If nothing significant has happened, reply only with: No significant updates."
+        )
+    
+    def _release_budget(self, amount):
+        """Return a finished topic's reserved estimate to the budget
+        
+        Args:
+            amount (float): Estimate reserved by _admit_topics
+        """
+        with self.budget_lock:
+            self.reserved_budget = max(0.0, self.reserved_budget - amount)
+    
+    def _process_topic_worker(self, app, topic_id, recorder, reserved=0.0):
+        """Worker function for processing one topic of a scheduled update
+        
+        Runs inside its own application context so that every worker gets
+        its own database session.
+        
+        Args:
+            app: Flask application instance
+            topic_id: ID of the topic to process
+            recorder (RunRecorder): Recorder of the topic's phase timeline
+            reserved (float, optional): Budget reserved for the topic, released
+                when it finishes. Defaults to 0.0.
+        """
+        try:
+            with app.app_context():
+                topic = db.session.get(Topic, topic_id)
+                if not topic:
+                    logger.warning(f"Topic {topic_id} was removed before it could be processed")
+                    return
+                
+                with recorder.topic(topic.id, topic.name) as timeline:
+                    try:
+                        with TOPICS_IN_FLIGHT.track(trigger="scheduled"):
+                            filename = self._process_topic(topic, app, refresh=True)
+                    except Exception as e:
+                        logger.error(f"Error processing topic {topic.name}: {str(e)}")
+                        self._fail_topic(topic, f"Error during scheduled update: {str(e)}")
+                        filename = None
+                    timeline.outcome = "completed" if filename else "error"
+        finally:
+            self._release_budget(reserved)
     
     def run_single_topic(self, app, topic_id):
-        """Run a search for a single topic (for manual runs)
+        """Queue a search for a single topic (for manual runs)
+        
+        Requests for a topic that is already queued or running are merged
+        into the existing job.
         
         Args:
             app: Flask application instance
             topic_id: ID of the topic to process
+            
+        Returns:
+            tuple: The topic's job and whether it was newly queued
+            
+        Raises:
+            queue.Full: If the manual search queue is full
         """
-        threading.Thread(
-            target=self._run_single_topic_thread,
-            args=(app, topic_id)
-        ).start()
+        return self.job_queue.submit(topic_id, app, topic_id)
     
-    def _run_single_topic_thread(self, app, topic_id):
-        """Thread function for running a single topic search
+    def _run_single_topic_job(self, app, topic_id):
+        """Job function for running a single topic search
         
         Args:
             app: Flask application instance
             topic_id: ID of the topic to process
+            
+        Raises:
+            RuntimeError: If the topic is missing or the search failed
         """
         with app.app_context():
-            topic = Topic.query.get(topic_id)
+            topic = db.session.get(Topic, topic_id)
             if not topic:
                 logger.error(f"Topic not found: {topic_id}")
-                return
+                raise RuntimeError(f"Topic not found: {topic_id}")
             
             logger.info(f"Running manual search for topic: {topic.name}")
             
-            # Create log entry for manual search
+            # Log the manual search; committed with the topic's processing status
             log = Log(
                 topic_id=topic.id,
                 status="info",
                 message=f"Manual search started for topic: {topic.name}"
             )
             db.session.add(log)
-            db.session.commit()
             
             # Process the topic
+            recorder = RunRecorder("manual")
             try:
-                self._process_topic(topic, app)
-            except Exception as e:
-                logger.error(f"Error in manual search for {topic.name}: {str(e)}")
-                log = Log(
-                    topic_id=topic.id,
-                    status="error",
-                    message=f"Error in manual search: {str(e)}"
-                )
-                db.session.add(log)
-                db.session.commit()
+                with recorder.topic(topic.id, topic.name) as timeline:
+                    try:
+                        with TOPICS_IN_FLIGHT.track(trigger="manual"):
+                            filename = self._process_topic(topic, app)
+                    except Exception as e:
+                        logger.error(f"Error in manual search for {topic.name}: {str(e)}")
+                        self._fail_topic(topic, f"Error in manual search: {str(e)}")
+                        raise
+                    timeline.outcome = "completed" if filename else "error"
+            finally:
+                self._save_run(recorder)
+            
+            if filename is None:
+                raise RuntimeError(f"Search failed for topic: {topic.name}")
+    
+    def _fail_topic(self, topic, message):
+        """Record a topic's failure
+        
+        The error status and its log entry are written in one commit, along
+        with pending changes such as the topic's cost history, unless the
+        failure broke the session's transaction.
+        
+        Args:
+            topic: Topic database model instance
+            message (str): Message for the activity log
+        """
+        if not db.session.is_active:
+            db.session.rollback()
+        topic.status = "error"
+        db.session.add(Log(topic_id=topic.id, status="error", message=message))
+        with span("commit"):
+            db.session.commit()
+        self._publish_topic_status(topic)
     
-    def _process_topic(self, topic, app):
+    def _process_topic(self, topic, app, refresh=False):
         """Process a single topic by making API call and generating journal entry
         
+        Each state transition is a single commit: the processing status, then
+        either the error status with its log entry, or the journal index rows,
+        the completed status and the success log entry together.
+        
         Args:
             topic: Topic database model instance
             app: Flask application instance
+            refresh (bool, optional): Ignore cached answers, as scheduled
+                updates must find what is new. Defaults to False (manual
+                searches reuse a recent answer).
         """
-        with self.lock:  # Ensure thread safety for API calls
-            logger.info(f"Processing topic: {topic.name}")
-            
-            # Update topic status
-            topic.status = "processing"
+        logger.info(f"Processing topic: {topic.name}")
+        
+        # Update topic status
+        topic.status = "processing"
+        with span("commit"):
             db.session.commit()
-            
-            # Prepare system message for this topic
-            system_message = (
-                f"You are a research assistant specializing in {topic.name}. "
-                f"Provide a comprehensive summary of the latest developments, research, "
-                f"and important information on this topic. Include citations to reliable "
-                f"sources. Be factual, objective, and thorough."
-            )
-            
-            # Make the API call
-            response = self.api_manager.query(
-                topic.query,
-                system_message=system_message,
-                max_tokens=1500  # Adjust based on needs
+        self._publish_topic_status(topic)
+        
+        # Delta topics only ask for what is new since their last successful run
+        previous = None
+        if topic.refresh_mode == "delta" and topic.last_updated:
+            previous = get_previous_entry(topic)
+        
+        # Deltas only ever add to an entry, so large entries start over
+        if previous is not None and len(previous[0].encode('utf-8')) > self.delta_max_bytes:
+            logger.info(f"Entry of {topic.name} exceeds {self.delta_max_bytes} bytes, running a full refresh")
+            previous = None
+        
+        if previous is not None:
+            system_message = self._delta_system_message(topic, previous[0])
+            max_tokens = self.delta_max_tokens
+        else:
+            system_message = self._system_message(topic)
+            max_tokens = self.topic_max_tokens
+        
+        # Make the API call, streaming the answer when enabled
+        on_chunk = self._partial_content_handler(topic) if self.stream_responses else None
+        response = self.api_manager.query(
+            topic.query,
+            system_message=system_message,
+            max_tokens=max_tokens,
+            on_chunk=on_chunk,
+            refresh=refresh
+        )
+        
+        # Keep the topic's cost history for budget admission
+        if response.get("cost") and not response.get("cached"):
+            topic.record_cost(response["cost"])
+        
+        # Check for errors
+        if "error" in response:
+            topic.status = "error"
+            log = Log(
+                topic_id=topic.id,
+                status="error",
+                message=f"API error: {response['error']}"
             )
-            
-            # Update API call count
-            status = Status.query.first()
-            if status:
-                status.api_calls_this_month += 1
-                db.session.commit()
-            
-            # Check for errors
-            if "error" in response:
-                topic.status = "error"
-                db.session.commit()
-                
-                log = Log(
-                    topic_id=topic.id,
-                    status="error",
-                    message=f"API error: {response['error']}"
-                )
-                db.session.add(log)
-                db.session.commit()
-                
-                logger.error(f"API error for topic {topic.name}: {response['error']}")
-                return
-            
-            # Generate journal entry
-            try:
-                filename = self.journal_generator(topic, response)
-                
-                # Update topic status
-                topic.status = "completed"
-                topic.last_updated = datetime.now()
-                db.session.commit()
-                
-                # Log success
-                log = Log(
-                    topic_id=topic.id,
-                    status="success",
-                    message=f"Successfully updated research for {topic.name}"
-                )
-                db.session.add(log)
+            db.session.add(log)
+            with span("commit"):
                 db.session.commit()
-                
-                logger.info(f"Successfully processed topic: {topic.name}")
-                return filename
+            self._publish_topic_status(topic)
             
-            except Exception as e:
-                topic.status = "error"
-                db.session.commit()
-                
-                logger.error(f"Error generating journal for {topic.name}: {str(e)}")
-                raise
+            logger.error(f"API error for topic {topic.name}: {response['error']}")
+            return
+        
+        # Generate journal entry; the caller records a failure
+        try:
+            filename = self.journal_generator(topic, response, previous=previous)
+        except Exception as e:
+            logger.error(f"Error generating journal for {topic.name}: {str(e)}")
+            # Drop partially written index rows but keep the cost of the call
+            db.session.rollback()
+            if response.get("cost") and not response.get("cached"):
+                topic.record_cost(response["cost"])
+            raise
+        
+        # Commit the index rows, the new status and the log entry together
+        topic.status = "completed"
+        topic.last_updated = datetime.now()
+        log = Log(
+            topic_id=topic.id,
+            status="success",
+            message=f"Successfully updated research for {topic.name}"
+        )
+        db.session.add(log)
+        with span("commit"):
+            db.session.commit()
+        self._publish_topic_status(topic, filename)
+        
+        logger.info(f"Successfully processed topic: {topic.name}")
+        return filename
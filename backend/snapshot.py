@@ -0,0 +1,104 @@
+import logging
+import threading
+import time
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+class Snapshot:
+    """In-process cache of a payload built from the database
+
+    The payload is built on first use and then served from memory until a
+    committed write touches one of the watched models. Writes are detected
+    per session on flush and only invalidate the snapshot once the
+    transaction commits, so a snapshot is never rebuilt from uncommitted
+    data. max_age bounds staleness for writes made by other processes.
+    """
+
+    def __init__(self, name, builder, max_age=None):
+        """Initialize the snapshot
+
+        Args:
+            name (str): Name used to track pending invalidations per session
+            builder (callable): Function returning the payload; runs inside an
+                application context
+            max_age (float, optional): Seconds after which the payload is rebuilt
+                even without local writes. Defaults to None (never).
+        """
+        self.name = name
+        self.builder = builder
+        self.max_age = max_age
+        self.payload = None
+        self.built_at = 0.0
+        self.version = 0
+        self.lock = threading.Lock()
+
+    def get(self):
+        """Get the cached payload, building it if needed
+
+        Returns:
+            The payload returned by the builder
+        """
+        with self.lock:
+            fresh = self.max_age is None or time.monotonic() - self.built_at < self.max_age
+            if self.payload is not None and fresh:
+                return self.payload
+            version = self.version
+
+        payload = self.builder()
+
+        with self.lock:
+            # Don't keep a payload that was built while a write was committed
+            if self.version == version:
+                self.payload = payload
+                self.built_at = time.monotonic()
+        return payload
+
+    def invalidate(self):
+        """Drop the cached payload"""
+        with self.lock:
+            self.version += 1
+            self.payload = None
+
+    def watch(self, model, *attributes):
+        """Invalidate the snapshot when committed writes touch a model
+
+        Args:
+            model: Model class to watch
+            *attributes (str): If given, updates only count when one of these
+                attributes changed. Inserts and deletes always count.
+        """
+        flag = f"snapshot:{self.name}"
+
+        def touches(instance, deleted=False):
+            if not isinstance(instance, model):
+                return False
+            if deleted or not attributes:
+                return True
+            state = inspect(instance)
+            return any(state.attrs[name].history.has_changes() for name in attributes)
+
+        @event.listens_for(Session, "before_flush")
+        def mark_flushed_writes(session, flush_context, instances):
+            if (any(touches(obj) for obj in session.new)
+                    or any(touches(obj) for obj in session.dirty)
+                    or any(touches(obj, deleted=True) for obj in session.deleted)):
+                session.info[flag] = True
+
+        @event.listens_for(Session, "do_orm_execute")
+        def mark_bulk_writes(orm_execute_state):
+            if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+                mapper = orm_execute_state.bind_mapper
+                if mapper is not None and issubclass(mapper.class_, model):
+                    orm_execute_state.session.info[flag] = True
+
+        @event.listens_for(Session, "after_commit")
+        def invalidate_after_commit(session):
+            if session.info.pop(flag, False):
+                self.invalidate()
+
+        @event.listens_for(Session, "after_soft_rollback")
+        def forget_rolled_back_writes(session, previous_transaction):
+            if previous_transaction.parent is None:
+                session.info.pop(flag, None)
@@ -0,0 +1,161 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+# Timeline of the topic being processed by the current thread or task
+_current = ContextVar("timeline", default=None)
+
+class Span:
+    """Handle of a recorded phase; set outcome to override the default"""
+
+    __slots__ = ("outcome",)
+
+    def __init__(self):
+        self.outcome = "ok"
+
+class TopicTimeline:
+    """Phase spans recorded while processing one topic of a run"""
+
+    def __init__(self, base, topic_id, topic_name):
+        """Initialize the timeline
+
+        Args:
+            base (float): perf_counter() value at the start of the run
+            topic_id (int): Topic ID
+            topic_name (str): Topic name
+        """
+        self.base = base
+        self.topic_id = topic_id
+        self.topic_name = topic_name
+        self.start = self.offset()
+        self.end = None
+        self.outcome = None
+        self.spans = []  # (phase, start, end, outcome) tuples
+
+    def offset(self, counter=None):
+        """Convert a perf_counter() value (default now) to milliseconds since the run started"""
+        if counter is None:
+            counter = time.perf_counter()
+        return round((counter - self.base) * 1000, 1)
+
+    def to_dict(self):
+        """Convert the timeline to a dictionary for JSON serialization"""
+        return {
+            "topic_id": self.topic_id,
+            "topic_name": self.topic_name,
+            "start": self.start,
+            "end": self.end,
+            "outcome": self.outcome,
+            "spans": self.spans
+        }
+
+class RunRecorder:
+    """Collects the topic timelines of a scheduled update or manual search
+
+    Topics may be processed by several threads at once; each records into
+    its own TopicTimeline, made current with topic().
+    """
+
+    def __init__(self, trigger):
+        """Initialize the recorder
+
+        Args:
+            trigger (str): What started the run ("scheduled" or "manual")
+        """
+        self.trigger = trigger
+        self.started_at = datetime.now()
+        self.base = time.perf_counter()
+        self.topics = []
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def topic(self, topic_id, topic_name):
+        """Record the spans of the with block into a new topic timeline
+
+        Args:
+            topic_id (int): Topic ID
+            topic_name (str): Topic name
+
+        Yields:
+            TopicTimeline: The timeline; set its outcome before the block ends
+        """
+        timeline = TopicTimeline(self.base, topic_id, topic_name)
+        token = _current.set(timeline)
+        try:
+            yield timeline
+        except Exception:
+            timeline.outcome = "error"
+            raise
+        finally:
+            _current.reset(token)
+            timeline.end = timeline.offset()
+            with self.lock:
+                self.topics.append(timeline)
+
+    def as_row(self):
+        """Get the column values of the run's Run row
+
+        Returns:
+            dict: Run model fields
+        """
+        with self.lock:
+            topics = sorted(self.topics, key=lambda timeline: timeline.start)
+
+        totals = {}
+        for timeline in topics:
+            for phase, start, end, outcome in timeline.spans:
+                totals[phase] = round(totals.get(phase, 0) + end - start, 1)
+
+        return {
+            "trigger": self.trigger,
+            "started_at": self.started_at,
+            "duration": round((time.perf_counter() - self.base) * 1000),
+            "topic_count": len(topics),
+            "error_count": sum(1 for timeline in topics if timeline.outcome != "completed"),
+            "phase_totals": json.dumps(totals, separators=(",", ":")),
+            "timeline": json.dumps([timeline.to_dict() for timeline in topics], separators=(",", ":"))
+        }
+
+@contextmanager
+def span(phase):
+    """Record the with block as a phase of the current topic's timeline
+
+    Does nothing when no topic is being recorded. The span's outcome is
+    "error" if the block raises, otherwise "ok" unless changed.
+
+    Args:
+        phase (str): Phase name
+
+    Yields:
+        Span: Handle whose outcome can be set
+    """
+    record = Span()
+    timeline = _current.get()
+    if timeline is None:
+        yield record
+        return
+
+    start = timeline.offset()
+    try:
+        yield record
+    except Exception:
+        record.outcome = "error"
+        raise
+    finally:
+        timeline.spans.append((phase, start, timeline.offset(), record.outcome))
+
+def add_span(phase, started, finished, outcome="ok"):
+    """Record an already timed phase of the current topic's timeline
+
+    Args:
+        phase (str): Phase name
+        started (float): perf_counter() value at the start of the phase
+        finished (float): perf_counter() value at the end of the phase
+        outcome (str, optional): Outcome of the phase. Defaults to "ok".
+    """
+    timeline = _current.get()
+    if timeline is not None:
+        timeline.spans.append((phase, timeline.offset(started), timeline.offset(finished), str(outcome)))
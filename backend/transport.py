@@ -0,0 +1,159 @@
+import itertools
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+logger = logging.getLogger(__name__)
+
+class ConnectionStats:
+    """Thread-safe counters describing how pooled connections are used"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connections = {}  # connection id -> {"requests": int, "connects": int}
+        self.next_id = itertools.count(1)
+
+    def record(self, conn):
+        """Record a request about to be sent on a pooled connection
+
+        Args:
+            conn: urllib3 connection object taken from the pool
+        """
+        # A connection without a socket is opened (or re-opened) by this request
+        is_new = getattr(conn, "sock", None) is None
+
+        with self.lock:
+            conn_id = getattr(conn, "_transport_id", None)
+            if conn_id is None:
+                conn_id = next(self.next_id)
+                conn._transport_id = conn_id
+                self.connections[conn_id] = {"requests": 0, "connects": 0}
+
+            counters = self.connections[conn_id]
+            counters["requests"] += 1
+            if is_new:
+                counters["connects"] += 1
+
+    def snapshot(self):
+        """Get a copy of the current counters
+
+        Returns:
+            dict: Aggregate and per-connection counters
+        """
+        with self.lock:
+            connections = [
+                {
+                    "id": conn_id,
+                    "requests": counters["requests"],
+                    "connects": counters["connects"],
+                    "reuses": counters["requests"] - counters["connects"]
+                }
+                for conn_id, counters in self.connections.items()
+            ]
+
+        total_requests = sum(c["requests"] for c in connections)
+        total_connects = sum(c["connects"] for c in connections)
+        return {
+            "requests": total_requests,
+            "connections_opened": total_connects,
+            "reused_requests": total_requests - total_connects,
+            "connections": connections
+        }
+
+def _counting_pool_class(base_class, stats):
+    """Create a connection pool class that reports every request to stats"""
+
+    def _make_request(self, conn, method, url, *args, **kwargs):
+        stats.record(conn)
+        return base_class._make_request(self, conn, method, url, *args, **kwargs)
+
+    return type(f"Counting{base_class.__name__}", (base_class,), {"_make_request": _make_request})
+
+class CountingHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools record per-connection reuse"""
+
+    def __init__(self, stats, **kwargs):
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _counting_pool_class(HTTPConnectionPool, self.stats),
+            "https": _counting_pool_class(HTTPSConnectionPool, self.stats)
+        }
+
+class PooledTransport:
+    """Keep-alive HTTP transport with a bounded connection pool
+
+    Wraps a requests.Session so that TCP/TLS connections and default headers
+    are reused across calls instead of being set up for every request.
+    """
+
+    def __init__(self, headers=None, pool_size=10, connect_timeout=5.0, read_timeout=30.0):
+        """Initialize the transport
+
+        Args:
+            headers (dict, optional): Headers sent with every request. Defaults to None.
+            pool_size (int, optional): Maximum number of connections kept open per host.
+                Defaults to 10.
+            connect_timeout (float, optional): Seconds to wait for a connection.
+                Defaults to 5.0.
+            read_timeout (float, optional): Seconds to wait for response data.
+                Defaults to 30.0.
+        """
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.stats = ConnectionStats()
+
+        self.session = requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+
+        adapter = CountingHTTPAdapter(
+            self.stats,
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            pool_block=True  # Wait for a free connection rather than opening extras
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @property
+    def timeout(self):
+        """tuple: (connect, read) timeout passed to requests"""
+        return (self.connect_timeout, self.read_timeout)
+
+    def post(self, url, **kwargs):
+        """Send a POST request over the pooled session
+
+        Args:
+            url (str): Request URL
+            **kwargs: Extra arguments passed to requests.Session.post
+
+        Returns:
+            requests.Response: The HTTP response
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.post(url, **kwargs)
+
+    def get_stats(self):
+        """Get connection pool configuration and reuse counters
+
+        Returns:
+            dict: Transport statistics
+        """
+        stats = self.stats.snapshot()
+        stats.update({
+            "pool_size": self.pool_size,
+            "connect_timeout": self.connect_timeout,
+            "read_timeout": self.read_timeout
+        })
+        return stats
+
+    def close(self):
+        """Close all pooled connections"""
+        self.session.close()
@@ -1,12 +1,18 @@
 import os
 import re
 import json
+import base64
+import html
 from datetime import datetime
 import logging
 import smtplib
+import yaml
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from config import Config
+from models import db, Topic, JournalEntry, JournalStat
+from journal_generator import CONTENT_HASH_PATTERN
+from scheduler import validate_schedule, REFRESH_MODES
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +29,46 @@ def sanitize_filename(filename):
     sanitized = re.sub(r'[^\w\-\.]', '_', filename)
     return sanitized
 
+def encode_cursor(values):
+    """Encode keyset pagination values as an opaque cursor string
+    
+    Args:
+        values (list): JSON-serializable sort key values of the last row
+        
+    Returns:
+        str: URL-safe cursor
+    """
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, types=(int,)):
+    """Decode a cursor created by encode_cursor
+    
+    Args:
+        cursor (str): Cursor string
+        types (tuple, optional): Expected type of each sort key value.
+            Defaults to (int,), a single row ID.
+        
+    Returns:
+        list: The encoded sort key values
+        
+    Raises:
+        ValueError: If the cursor is malformed or its values are not of the
+            expected types
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    for value, expected in zip(values, types):
+        # bool is a subclass of int, but never a row ID
+        if not isinstance(value, expected) or isinstance(value, bool):
+            raise ValueError(f"Invalid cursor: {cursor}")
+    return values
+
 def parse_time_string(time_str):
     """Parse a time string in HH:MM format
     
@@ -113,10 +159,12 @@ def send_email_notification(recipient, subject, message, html_message=None):
 def get_journal_stats():
     """Get statistics about the journal entries
     
+    Served from the JournalStat aggregates, which are updated as entries are
+    written, so the cost does not grow with the size of the journal.
+    
     Returns:
         dict: Journal statistics
     """
-    journal_dir = Config.JOURNAL_DIR
     stats = {
         'total_entries': 0,
         'topics': {},
@@ -124,37 +172,315 @@ def get_journal_stats():
         'tags': {}
     }
     
-    if not os.path.exists(journal_dir):
-        return stats
+    for stat in JournalStat.query.filter(JournalStat.count > 0):
+        if stat.kind == 'total':
+            stats['total_entries'] = stat.count
+        elif stat.kind == 'topic':
+            stats['topics'][stat.key] = stat.count
+        elif stat.kind == 'tag':
+            stats['tags'][stat.key] = stat.count
+    
+    # Uses the updated_at index, so this does not scan the table
+    last_updated = db.session.query(db.func.max(JournalEntry.updated_at)).scalar()
+    if last_updated:
+        stats['last_updated'] = last_updated.strftime('%Y-%m-%d %H:%M:%S')
+    
+    return stats
+
+def rebuild_journal_stats():
+    """Recompute the JournalStat aggregates from the journal index
+    
+    The caller is responsible for committing the database session.
+    """
+    JournalStat.query.delete()
+    
+    counts = {}
+    for topic_name, tags in db.session.query(JournalEntry.topic_name, JournalEntry.tags):
+        counts[('total', '')] = counts.get(('total', ''), 0) + 1
+        counts[('topic', topic_name)] = counts.get(('topic', topic_name), 0) + 1
+        for tag in tags.split(',') if tags else []:
+            counts[('tag', tag)] = counts.get(('tag', tag), 0) + 1
     
-    for filename in os.listdir(journal_dir):
-        if filename.endswith('.html'):
-            stats['total_entries'] += 1
-            
-            # Extract topic name from filename
+    db.session.add_all(
+        JournalStat(kind=kind, key=key, count=count) for (kind, key), count in counts.items()
+    )
+
+def rebuild_journal_index(journal_dir=None):
+    """Rebuild the JournalEntry index and statistics from the journal files
+    
+    Reads every journal file, so this is meant for one-off maintenance such
+    as indexing entries generated before the index existed, or repairing the
+    statistics after files were changed outside the application.
+    
+    Args:
+        journal_dir (str, optional): Journal directory. Defaults to Config.JOURNAL_DIR.
+        
+    Returns:
+        int: Number of indexed entries
+    """
+    journal_dir = journal_dir or Config.JOURNAL_DIR
+    topics_by_name = {topic.name: topic for topic in db.session.query(Topic).all()}
+    existing = {entry.filename: entry for entry in JournalEntry.query.all()}
+    
+    filenames = []
+    if os.path.exists(journal_dir):
+        filenames = sorted(f for f in os.listdir(journal_dir) if f.endswith('.html'))
+    
+    for filename in filenames:
+        filepath = os.path.join(journal_dir, filename)
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except Exception as e:
+            logger.error(f"Error parsing file {filename}: {str(e)}")
+            continue
+        
+        title_match = re.search(r'<title>(.*?) \| Research Journal</title>', content)
+        if title_match:
+            topic_name = html.unescape(title_match.group(1))
+        else:
             topic_name = os.path.splitext(filename)[0].replace('-', ' ').title()
-            stats['topics'][topic_name] = stats['topics'].get(topic_name, 0) + 1
-            
-            # Get file modification time
-            mod_time = os.path.getmtime(os.path.join(journal_dir, filename))
-            mod_date = datetime.fromtimestamp(mod_time)
-            
-            # Update last updated time
-            if not stats['last_updated'] or mod_date > stats['last_updated']:
-                stats['last_updated'] = mod_date
-            
-            # Try to extract tags from file
+        hash_match = CONTENT_HASH_PATTERN.search(content)
+        topic = topics_by_name.get(topic_name)
+        
+        entry = existing.get(filename)
+        if entry is None:
+            entry = JournalEntry(filename=filename)
+            db.session.add(entry)
+        
+        entry.topic_id = topic.id if topic else None
+        entry.topic_name = topic_name
+        entry.tags = ','.join(re.findall(r'<span class="tag">(.*?)</span>', content))
+        entry.content_hash = hash_match.group(1) if hash_match else None
+        entry.updated_at = datetime.fromtimestamp(os.path.getmtime(filepath))
+    
+    # Drop index rows whose files no longer exist
+    for filename in set(existing) - set(filenames):
+        db.session.delete(existing[filename])
+    
+    db.session.flush()
+    rebuild_journal_stats()
+    db.session.commit()
+    logger.info(f"Rebuilt journal index with {len(filenames)} entries")
+    return len(filenames)
+
+def read_topic_settings(data, topic=None):
+    """Read and validate the optional per-topic schedule and refresh fields of a request
+    
+    Args:
+        data (dict): Request data
+        topic: Topic being updated, whose settings are kept for missing fields
+        
+    Returns:
+        tuple: Frequency, cron expression (None when not set) and refresh mode
+        
+    Raises:
+        ValueError: If the frequency, cron expression or refresh mode is invalid
+    """
+    for field in ('frequency', 'cron', 'refresh_mode'):
+        if data.get(field) is not None and not isinstance(data[field], str):
+            raise ValueError(f"Invalid {field}: must be a string")
+    
+    frequency = data.get('frequency', topic.frequency if topic else None) or None
+    cron = (data.get('cron', topic.cron if topic else None) or '').strip() or None
+    validate_schedule(frequency, cron)
+    
+    refresh_mode = data.get('refresh_mode', topic.refresh_mode if topic else None) or 'full'
+    if refresh_mode not in REFRESH_MODES:
+        raise ValueError(f"Unsupported refresh mode: {refresh_mode}")
+    return frequency, cron, refresh_mode
+
+# Fields written by export_topics; imports ignore fields they do not know
+TOPIC_EXPORT_FIELDS = (
+    'id', 'name', 'query', 'frequency', 'cron', 'refresh_mode',
+    'status', 'created_at', 'last_updated'
+)
+
+def parse_topic_document(text, yaml_format=False):
+    """Parse a topic import document
+    
+    Args:
+        text (str): JSON or YAML document holding a list of topics, or an
+            object with a "topics" list
+        yaml_format (bool, optional): Parse as YAML. Defaults to False (JSON).
+        
+    Returns:
+        list: Topic rows
+        
+    Raises:
+        ValueError: If the document is malformed or holds no topic list
+    """
+    try:
+        document = yaml.safe_load(text) if yaml_format else json.loads(text)
+    except (ValueError, yaml.YAMLError) as e:
+        raise ValueError(f"Invalid topic document: {e}") from e
+    
+    if isinstance(document, dict):
+        document = document.get('topics')
+    if not isinstance(document, list):
+        raise ValueError("Topic document must be a list of topics or an object with a 'topics' list")
+    return document
+
+def import_topics(rows, batch_size=500, on_commit=None):
+    """Create or update topics in batched transactions
+    
+    Rows with the "id" of an existing topic update that topic; other rows,
+    including rows whose id does not exist (such as an export from another
+    database), update the topic with the same name or create a new one. Each batch is committed in a single
+    transaction, and invalid rows are reported without stopping the import.
+    
+    Args:
+        rows (list): Topic rows (dicts with name, query and optional frequency,
+            cron and refresh_mode)
+        batch_size (int, optional): Rows per transaction. Defaults to 500.
+        on_commit (callable, optional): Called with the created and updated
+            topics after each committed batch. Defaults to None.
+        
+    Returns:
+        list: One result per row with its index, status ("created", "updated"
+            or "error"), topic id and error message
+    """
+    results = []
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        batch_results = []
+        
+        # Load every topic the batch refers to in two queries
+        ids = [row['id'] for row in batch if isinstance(row, dict) and isinstance(row.get('id'), int)]
+        names = [row['name'] for row in batch if isinstance(row, dict) and isinstance(row.get('name'), str)]
+        by_id = {topic.id: topic for topic in db.session.query(Topic).filter(Topic.id.in_(ids))}
+        by_name = {}
+        for topic in db.session.query(Topic).filter(Topic.name.in_(names)).order_by(Topic.id):
+            by_name.setdefault(topic.name, topic)
+        
+        touched = []
+        for index, row in enumerate(batch, start):
             try:
-                with open(os.path.join(journal_dir, filename), 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    tag_matches = re.findall(r'<span class="tag">(.*?)</span>', content)
-                    for tag in tag_matches:
-                        stats['tags'][tag] = stats['tags'].get(tag, 0) + 1
-            except Exception as e:
-                logger.error(f"Error parsing file {filename}: {str(e)}")
-    
-    # Format last updated time
-    if stats['last_updated']:
-        stats['last_updated'] = stats['last_updated'].strftime('%Y-%m-%d %H:%M:%S')
+                topic, created = _import_topic_row(row, by_id, by_name)
+            except ValueError as e:
+                batch_results.append({"row": index, "status": "error", "id": None, "error": str(e)})
+                continue
+            touched.append(topic)
+            batch_results.append({"row": index, "status": "created" if created else "updated", "topic": topic})
+        
+        try:
+            db.session.flush()  # Assigns IDs to the new topics
+            for result in batch_results:
+                topic = result.pop("topic", None)
+                if topic is not None:
+                    result.update(id=topic.id, error=None)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to import topic rows {start}-{start + len(batch) - 1}: {e}")
+            batch_results = [
+                {"row": index, "status": "error", "id": None, "error": f"Batch failed: {e}"}
+                for index in range(start, start + len(batch))
+            ]
+            touched = []
+        
+        results.extend(batch_results)
+        
+        if touched and on_commit is not None:
+            # Reload the committed batch in one query instead of one per topic
+            topic_ids = [topic.id for topic in touched]
+            on_commit(db.session.query(Topic).filter(Topic.id.in_(topic_ids)).all())
     
-    return stats
+    logger.info(f"Imported {len(rows)} topic rows")
+    return results
+
+def _import_topic_row(row, by_id, by_name):
+    """Apply one import row to a new or existing topic
+    
+    Args:
+        row (dict): Topic row
+        by_id (dict): Existing topics of the batch by ID
+        by_name (dict): Existing topics of the batch by name, updated with
+            topics created by earlier rows
+        
+    Returns:
+        tuple: The topic and whether it was created
+        
+    Raises:
+        ValueError: If the row is invalid
+    """
+    if not isinstance(row, dict):
+        raise ValueError("Row must be an object")
+    if row.get('id') is not None and (not isinstance(row['id'], int) or isinstance(row['id'], bool)):
+        raise ValueError("Invalid topic id: must be an integer")
+    if row.get('name') is not None and not isinstance(row['name'], str):
+        raise ValueError("Invalid topic name: must be a string")
+    
+    topic = by_id.get(row['id']) if row.get('id') is not None else None
+    if topic is None:
+        topic = by_name.get(row.get('name'))
+    
+    name = row.get('name', topic.name if topic else None)
+    query = row.get('query', topic.query if topic else None)
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError("Missing topic name")
+    if not isinstance(query, str) or not query.strip():
+        raise ValueError("Missing topic query")
+    frequency, cron, refresh_mode = read_topic_settings(row, topic)
+    
+    created = topic is None
+    if created:
+        topic = Topic(created_at=datetime.now())
+        db.session.add(topic)
+    
+    topic.name = name.strip()
+    topic.query = query.strip()
+    topic.frequency = frequency
+    topic.cron = cron
+    topic.refresh_mode = refresh_mode
+    by_name.setdefault(topic.name, topic)
+    return topic, created
+
+def export_topics(yaml_format=False, batch_size=500):
+    """Stream every topic as a JSON or YAML list
+    
+    Topics are read in ID order one batch at a time, so memory use does not
+    grow with the number of topics.
+    
+    Args:
+        yaml_format (bool, optional): Produce YAML. Defaults to False (JSON).
+        batch_size (int, optional): Topics read per query. Defaults to 500.
+        
+    Yields:
+        str: Chunks of the document
+    """
+    if not yaml_format:
+        yield '['
+    
+    last_id = 0
+    first = True
+    while True:
+        topics = (
+            db.session.query(Topic)
+            .filter(Topic.id > last_id)
+            .order_by(Topic.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not topics:
+            break
+        
+        rows = []
+        for topic in topics:
+            data = topic.to_dict()
+            rows.append({field: data[field] for field in TOPIC_EXPORT_FIELDS})
+        
+        if yaml_format:
+            yield yaml.safe_dump(rows, sort_keys=False, allow_unicode=True)
+        else:
+            chunk = ',\n'.join(json.dumps(row) for row in rows)
+            yield ('\n' if first else ',\n') + chunk
+        
+        first = False
+        last_id = topics[-1].id
+        db.session.expunge_all()  # Keep the session from holding every exported topic
+    
+    if not yaml_format:
+        yield '\n]\n'
+    elif first:
+        yield '[]\n'
@@ -0,0 +1,214 @@
+"""Micro-benchmark of the journal generation pipeline
+
+Times each stage of generate_journal_entry (the markdown check, markdown
+conversion, extract_tags, template rendering and the file write) and the
+whole pipeline on synthetic answers of increasing size and with different
+heading and citation densities. The section cache is cleared and the
+journal file removed before every iteration, so each one does the full work.
+
+    python benchmarks/bench_journal.py --sizes 1K,100K,4M --profiles default,dense
+"""
+import argparse
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from common import (BASELINE_DIR, RESULTS_DIR, TEMPLATE_DIR, compare_results, load_json,
+                    save_results, use_backend)
+from synthetic import citations_in, make_markdown
+
+# Heading and citation densities per KB of answer
+PROFILES = {
+    "sparse": {"headings_per_kb": 0.1, "citations_per_kb": 0.5},
+    "default": {"headings_per_kb": 0.5, "citations_per_kb": 2.0},
+    "dense": {"headings_per_kb": 4.0, "citations_per_kb": 8.0}
+}
+
+STAGES = ("detect", "markdown", "extract_tags", "render", "write", "pipeline")
+
+# Metric name -> True if higher is better
+COMPARED_METRICS = dict({f"{stage}_ms": False for stage in STAGES}, pipeline_mb_per_s=True)
+
+def parse_size(text):
+    """Parse a size such as 512, 10K or 4M into a number of characters"""
+    text = text.strip().upper()
+    for suffix, factor in (("K", 1024), ("M", 1024 * 1024)):
+        if text.endswith(suffix):
+            return int(float(text[:-1]) * factor)
+    return int(text)
+
+def format_size(size):
+    """Format a number of characters as in the --sizes argument"""
+    for suffix, factor in (("M", 1024 * 1024), ("K", 1024)):
+        if size >= factor and size % factor == 0:
+            return f"{size // factor}{suffix}"
+    return str(size)
+
+class Stopwatch:
+    """Collects the durations of named stages over many iterations"""
+
+    def __init__(self):
+        self.samples = {stage: [] for stage in STAGES}
+
+    def time(self, stage, function, *args, **kwargs):
+        """Call function, record its duration under stage and return its result"""
+        started = time.perf_counter()
+        result = function(*args, **kwargs)
+        self.samples[stage].append(time.perf_counter() - started)
+        return result
+
+    def summary(self):
+        """Median and minimum milliseconds per stage"""
+        data = {}
+        for stage, samples in self.samples.items():
+            if samples:
+                data[f"{stage}_ms"] = round(statistics.median(samples) * 1000, 3)
+                data[f"{stage}_min_ms"] = round(min(samples) * 1000, 3)
+        return data
+
+def run_case(jg, db, Topic, size, profile, min_time, max_iterations):
+    """Benchmark one answer size and profile
+
+    Args:
+        jg: The journal_generator module
+        db: The database
+        Topic: The Topic model
+        size (int): Answer size in characters
+        profile (str): Name of an entry in PROFILES
+        min_time (float): Seconds to keep repeating each measurement for
+        max_iterations (int): Maximum repetitions
+
+    Returns:
+        dict: Measurements of the case
+    """
+    text = make_markdown(size, **PROFILES[profile])
+    citations = citations_in(text)
+    topic = Topic(name=f"Benchmark {format_size(size)} {profile}", query="Synthetic benchmark query")
+    filepath = os.path.join("frontend", "journal_html", jg.journal_filename(topic))
+    template = jg.get_journal_template()
+    stopwatch = Stopwatch()
+
+    def clear_caches():
+        with jg._section_cache_lock:
+            jg._section_cache.clear()
+        for extension in [""] + [extension for extension, _ in jg.compressed_variants()]:
+            if os.path.exists(filepath + extension):
+                os.remove(filepath + extension)
+
+    iterations = 0
+    started = time.perf_counter()
+    while iterations < max_iterations and (iterations < 3 or time.perf_counter() - started < min_time):
+        iterations += 1
+
+        # Individual stages, in pipeline order
+        clear_caches()
+        is_markdown = stopwatch.time("detect", jg.looks_like_markdown, text)
+        content = stopwatch.time("markdown", jg.render_markdown, text) if is_markdown else text
+        tags = stopwatch.time("extract_tags", jg.extract_tags, content, topic.name)
+        template_data = {"title": topic.name, "content": content, "citations": citations,
+                         "tags": tags, "query": topic.query}
+
+        def render():
+            content_hash = jg.compute_content_hash(template_data, template)
+            return content_hash, template.render(timestamp="2024-01-01 00:00:00",
+                                                 content_hash=content_hash, **template_data)
+
+        content_hash, html_content = stopwatch.time("render", render)
+        stopwatch.time("write", jg.write_journal_file, filepath, html_content, content_hash)
+
+        # The whole pipeline, including the journal index update
+        clear_caches()
+        stopwatch.time("pipeline", jg.generate_journal_entry, topic,
+                       {"content": text, "citations": citations})
+        db.session.rollback()
+
+    clear_caches()
+    result = {
+        "case": f"{format_size(size)}/{profile}",
+        "size": size,
+        "profile": profile,
+        "headings": text.count("\n## ") + text.startswith("## "),
+        "citations": len(citations),
+        "html_bytes": len(html_content.encode("utf-8")),
+        "iterations": iterations
+    }
+    result.update(stopwatch.summary())
+    result["pipeline_mb_per_s"] = round(size / (1024 * 1024) / (result["pipeline_ms"] / 1000), 2)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1K,10K,100K,1M,4M", help="Comma-separated answer sizes")
+    parser.add_argument("--profiles", default=",".join(PROFILES),
+                        help=f"Comma-separated density profiles ({', '.join(PROFILES)})")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Seconds to repeat each case for")
+    parser.add_argument("--max-iterations", type=int, default=200, help="Maximum repetitions per case")
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "journal.json"),
+                        help="Where to write the results")
+    parser.add_argument("--baseline", default=os.path.join(BASELINE_DIR, "journal.json"),
+                        help="Baseline to compare with")
+    parser.add_argument("--update-baseline", action="store_true", help="Save the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Relative change reported as a regression")
+    args = parser.parse_args()
+
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+    profiles = args.profiles.split(",")
+    unknown = [profile for profile in profiles if profile not in PROFILES]
+    if unknown:
+        parser.error(f"Unknown profiles: {', '.join(unknown)}")
+
+    use_backend()
+    logging.basicConfig(level=logging.WARNING)
+    from flask import Flask
+    from models import db, Topic
+    import journal_generator as jg
+
+    # Journal files are written below the working directory
+    args.output = os.path.abspath(args.output)
+    args.baseline = os.path.abspath(args.baseline)
+    original_dir = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="bench-journal-")
+    os.chdir(workdir)
+    results = []
+    try:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        db.init_app(app)
+        jg.configure_renderer(template_dir=TEMPLATE_DIR)
+        os.makedirs(os.path.join("frontend", "journal_html"), exist_ok=True)
+
+        with app.app_context():
+            db.create_all()
+            for size in sizes:
+                for profile in profiles:
+                    result = run_case(jg, db, Topic, size, profile, args.min_time, args.max_iterations)
+                    results.append(result)
+                    print(f"{result['case']:>14}: " + "  ".join(
+                        f"{stage} {result[f'{stage}_ms']:9.3f}ms" for stage in STAGES
+                    ) + f"  ({result['pipeline_mb_per_s']} MB/s, {result['iterations']} iterations)")
+    finally:
+        os.chdir(original_dir)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    config = {"sizes": sizes, "profiles": {name: PROFILES[name] for name in profiles},
+              "min_time": args.min_time, "max_iterations": args.max_iterations}
+    document = save_results(args.output, "journal", config, results)
+    print(f"Results written to {args.output}")
+
+    if args.update_baseline:
+        save_results(args.baseline, "journal", config, results)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    baseline = load_json(args.baseline)
+    if baseline is None:
+        return 0
+    regressions = compare_results(baseline, document, "case", COMPARED_METRICS, args.tolerance)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
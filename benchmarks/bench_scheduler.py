@@ -0,0 +1,181 @@
+"""End-to-end benchmark of scheduled updates against a local fake Perplexity API
+
+Each topic count runs in a fresh process with its own temporary database
+and journal directory, so that peak RSS is measured per case. Per-topic
+latencies come from the run timeline the scheduler records.
+
+    python benchmarks/bench_scheduler.py --topics 10,100,1000 --latency 0.2
+    python benchmarks/bench_scheduler.py --update-baseline
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import (BASELINE_DIR, RESULTS_DIR, TEMPLATE_DIR, compare_results, load_json,
+                    peak_rss_mb, percentile, save_results, use_backend)
+from fake_perplexity import add_server_arguments, server_settings, start_server
+
+# Metric name -> True if higher is better
+COMPARED_METRICS = {"throughput": True, "p50_ms": False, "p99_ms": False, "peak_rss_mb": False}
+
+def run_case(topics, base_url, workers=4, stream=False, requests_per_minute=600000):
+    """Run one scheduled update over a fresh set of topics
+
+    Args:
+        topics (int): Number of topics
+        base_url (str): Base URL of the fake API
+        workers (int, optional): Scheduler worker threads. Defaults to 4.
+        stream (bool, optional): Stream API answers. Defaults to False.
+        requests_per_minute (float, optional): Rate limiter setting, high by
+            default so that the limiter only matters after 429s. Defaults to 600000.
+
+    Returns:
+        dict: Measurements of the run
+    """
+    use_backend()
+    logging.basicConfig(level=logging.WARNING)
+    from flask import Flask
+    from models import db, Topic, Schedule, Status, Run, sqlite_engine_options, apply_sqlite_pragmas
+    from perplexity_api import PerplexityAPIManager
+    from scheduler import SchedulerManager
+    from journal_generator import configure_renderer, generate_journal_entry
+
+    # Journal files are written below the working directory
+    original_dir = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="bench-scheduler-")
+    os.chdir(workdir)
+    try:
+        app = Flask(__name__)
+        database_uri = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = sqlite_engine_options(database_uri, pool_size=workers + 4)
+        db.init_app(app)
+        with app.app_context():
+            apply_sqlite_pragmas(db.engine)
+            db.create_all()
+            db.session.add(Status(api_calls_this_month=0))
+            db.session.add(Schedule())
+            db.session.add_all(
+                Topic(name=f"Benchmark topic {index}", query=f"Latest research on subject {index}")
+                for index in range(topics)
+            )
+            db.session.commit()
+
+        configure_renderer(template_dir=TEMPLATE_DIR)
+        api_manager = PerplexityAPIManager(
+            "benchmark",
+            daily_budget=1e9,
+            pool_size=max(10, workers),
+            requests_per_minute=requests_per_minute,
+            burst=max(5, workers),
+            base_url=base_url
+        )
+        manager = SchedulerManager(api_manager, generate_journal_entry, max_workers=workers,
+                                   stream_responses=stream)
+
+        started = time.perf_counter()
+        manager.run_scheduled_update(app)
+        seconds = time.perf_counter() - started
+
+        with app.app_context():
+            run = db.session.query(Run).order_by(Run.id.desc()).first()
+            timeline = run.to_dict(include_timeline=True) if run else {"topics": [], "phase_totals": {}}
+            completed = db.session.query(Topic).filter(Topic.status == "completed").count()
+    finally:
+        os.chdir(original_dir)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    latencies = [topic["end"] - topic["start"] for topic in timeline["topics"]]
+    return {
+        "topics": topics,
+        "completed": completed,
+        "seconds": round(seconds, 3),
+        "throughput": round(topics / seconds, 2),
+        "p50_ms": round(percentile(latencies, 0.5) or 0, 1),
+        "p99_ms": round(percentile(latencies, 0.99) or 0, 1),
+        "peak_rss_mb": peak_rss_mb(),
+        "phase_totals": timeline["phase_totals"]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--topics", default="10,100,1000", help="Comma-separated topic counts")
+    parser.add_argument("--workers", type=int, default=4, help="Scheduler worker threads")
+    parser.add_argument("--stream", action="store_true", help="Stream API answers")
+    parser.add_argument("--requests-per-minute", type=float, default=600000,
+                        help="Client rate limit (high by default so only 429s slow it down)")
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "scheduler.json"),
+                        help="Where to write the results")
+    parser.add_argument("--baseline", default=os.path.join(BASELINE_DIR, "scheduler.json"),
+                        help="Baseline to compare with")
+    parser.add_argument("--update-baseline", action="store_true", help="Save the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Relative change reported as a regression")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    if args.child:
+        # Worker process: run one case and report it on stdout
+        print(json.dumps(run_case(**json.loads(args.child))))
+        return 0
+
+    server = start_server(**server_settings(args))
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    config = dict(server_settings(args), workers=args.workers, stream=args.stream,
+                  requests_per_minute=args.requests_per_minute)
+
+    results = []
+    invalid = []
+    for topics in (int(value) for value in args.topics.split(",")):
+        case = {"topics": topics, "base_url": base_url, "workers": args.workers,
+                "stream": args.stream, "requests_per_minute": args.requests_per_minute}
+        before = server.get_stats()
+        process = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", json.dumps(case)],
+                                 capture_output=True, text=True)
+        if process.returncode != 0:
+            print(process.stderr, file=sys.stderr)
+            return 1
+
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+        after = server.get_stats()
+        for counter in ("requests", "rate_limited", "error"):
+            result[f"server_{counter}"] = after[counter] - before[counter]
+        # Throughput and latencies of failed topics measure the error path
+        result["valid"] = result["completed"] == topics
+        if not result["valid"]:
+            invalid.append(f"{topics} topics: only {result['completed']} completed")
+        results.append(result)
+        print(f"{topics:>6} topics: {result['seconds']:8.2f}s  {result['throughput']:8.2f} topics/s  "
+              f"p50 {result['p50_ms']:8.1f}ms  p99 {result['p99_ms']:8.1f}ms  "
+              f"RSS {result['peak_rss_mb']:7.1f}MB  ({result['completed']} completed, "
+              f"{result['server_rate_limited']} rate limited)")
+
+    server.shutdown()
+    document = save_results(args.output, "scheduler", config, results)
+    print(f"Results written to {args.output}")
+
+    if invalid:
+        print("Invalid results, not all topics completed:\n  " + "\n  ".join(invalid), file=sys.stderr)
+        return 1
+
+    if args.update_baseline:
+        save_results(args.baseline, "scheduler", config, results)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    baseline = load_json(args.baseline)
+    if baseline is None:
+        return 0
+    if baseline.get("config") != config:
+        print("Note: the baseline was recorded with different settings")
+    regressions = compare_results(baseline, document, "topics", COMPARED_METRICS, args.tolerance)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+import json
+import os
+import platform
+import resource
+import sys
+from datetime import datetime
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+BACKEND_DIR = os.path.join(REPO_DIR, "backend")
+TEMPLATE_DIR = os.path.join(REPO_DIR, "frontend", "templates")
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+BASELINE_DIR = os.path.join(BENCHMARK_DIR, "baselines")
+
+def use_backend():
+    """Make the backend modules importable, including the hyphenated files"""
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    import module_shim
+    module_shim.install(BACKEND_DIR)
+
+def percentile(values, fraction):
+    """Get a percentile of a list of numbers by linear interpolation
+
+    Args:
+        values (list): Numbers
+        fraction (float): Percentile as a fraction, e.g. 0.99
+
+    Returns:
+        float: The percentile, or None for an empty list
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def save_results(path, benchmark, config, results):
+    """Write benchmark results as JSON
+
+    Args:
+        path (str): Output file
+        benchmark (str): Benchmark name
+        config (dict): Settings the benchmark ran with
+        results (list): One dictionary per measured case
+
+    Returns:
+        dict: The written document
+    """
+    document = {
+        "benchmark": benchmark,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "results": results
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+        f.write("\n")
+    return document
+
+def compare_results(baseline, current, key, metrics, tolerance=0.1):
+    """Compare results with a saved baseline and print the differences
+
+    Args:
+        baseline (dict): Document written by save_results
+        current (dict): Document written by save_results
+        key (str): Field identifying a case in both result lists
+        metrics (dict): Metric name -> True if higher is better, False if lower is better
+        tolerance (float, optional): Relative change reported as a regression.
+            Defaults to 0.1.
+
+    Returns:
+        list: Descriptions of the regressions found
+    """
+    previous = {result[key]: result for result in baseline.get("results", [])}
+    regressions = []
+    print(f"\nComparison with baseline from {baseline.get('created_at')} (tolerance {tolerance:.0%}):")
+    for result in current["results"]:
+        old = previous.get(result[key])
+        if old is None:
+            print(f"  {key}={result[key]}: not in baseline")
+            continue
+        for metric, higher_is_better in metrics.items():
+            before, after = old.get(metric), result.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            worse = change < -tolerance if higher_is_better else change > tolerance
+            marker = "  REGRESSION" if worse else ""
+            print(f"  {key}={result[key]} {metric}: {before:g} -> {after:g} ({change:+.1%}){marker}")
+            if worse:
+                regressions.append(f"{key}={result[key]} {metric} {change:+.1%}")
+    return regressions
+
+def load_json(path):
+    """Read a JSON document, or return None if the file does not exist"""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,234 @@
+"""Local stand-in for the Perplexity chat completions API
+
+Answers POST /chat/completions with synthetic research answers after a
+configurable latency, and injects 429 and 500 responses at configurable
+rates. Streaming requests get Server-Sent Events like the real API.
+GET /stats reports the number of requests of each kind.
+
+    python benchmarks/fake_perplexity.py --port 8765 --latency 0.2 --rate-limited 0.05
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from synthetic import make_markdown
+
+class FakePerplexityHandler(BaseHTTPRequestHandler):
+    """Request handler; settings are read from the server instance"""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+    disable_nagle_algorithm = True  # Headers and body are separate writes
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, data, headers=None):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            self._send_json(200, self.server.get_stats())
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": "Invalid JSON"})
+            return
+
+        server = self.server
+        outcome = server.choose_outcome()
+        if outcome == "rate_limited":
+            self._send_json(429, {"error": "Rate limit exceeded"},
+                            {"Retry-After": str(server.retry_after)})
+            return
+
+        time.sleep(server.delay())
+        if outcome == "error":
+            self._send_json(500, {"error": "Injected server error"})
+            return
+
+        content = server.next_answer()
+        model = payload.get("model", "sonar")
+        usage = {"prompt_tokens": 200, "completion_tokens": max(1, len(content) // 4)}
+        if not payload.get("stream"):
+            self._send_json(200, {
+                "id": "bench",
+                "model": model,
+                "choices": [{"message": {"role": "assistant", "content": content}}],
+                "usage": usage
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        step = server.stream_chunk
+        for start in range(0, len(content), step):
+            event = {"id": "bench", "model": model,
+                     "choices": [{"delta": {"content": content[start:start + step]}}]}
+            if start + step >= len(content):
+                event["usage"] = usage
+            self._write_chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+class FakePerplexityServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the fake API's settings and counters"""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.05, jitter=0.0, rate_limited=0.0, retry_after=1.0,
+                 error_rate=0.0, response_size=4096, headings_per_kb=0.5, citations_per_kb=2.0,
+                 stream_chunk=64, variants=8, seed=0):
+        """Initialize the server
+
+        Args:
+            address (tuple): (host, port) to listen on; port 0 picks a free port
+            latency (float, optional): Seconds before each answer. Defaults to 0.05.
+            jitter (float, optional): Maximum extra random latency in seconds.
+                Defaults to 0.0.
+            rate_limited (float, optional): Fraction of requests answered with 429.
+                Defaults to 0.0.
+            retry_after (float, optional): Retry-After seconds sent with 429s.
+                Defaults to 1.0.
+            error_rate (float, optional): Fraction of requests answered with 500.
+                Defaults to 0.0.
+            response_size (int, optional): Characters per answer. Defaults to 4096.
+            headings_per_kb (float, optional): Section headings per KB of answer.
+                Defaults to 0.5.
+            citations_per_kb (float, optional): Citations per KB of answer.
+                Defaults to 2.0.
+            stream_chunk (int, optional): Characters per streamed event. Defaults to 64.
+            variants (int, optional): Number of different answers served in turn.
+                Defaults to 8.
+            seed (int, optional): Random seed. Defaults to 0.
+        """
+        super().__init__(address, FakePerplexityHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limited = rate_limited
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.stream_chunk = max(1, stream_chunk)
+        self.random = random.Random(seed)
+        # Answers are generated up front so that serving them costs nothing
+        self.answers = [
+            make_markdown(response_size, headings_per_kb, citations_per_kb, seed=seed + index)
+            for index in range(max(1, variants))
+        ]
+        self.counts = {"requests": 0, "ok": 0, "rate_limited": 0, "error": 0}
+        self.served = 0
+        self.lock = threading.Lock()
+
+    def handle_error(self, request, client_address):
+        # Clients closing keep-alive connections when they exit are expected
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+    def choose_outcome(self):
+        """Count a request and decide whether it succeeds, is rate limited or fails"""
+        with self.lock:
+            self.counts["requests"] += 1
+            roll = self.random.random()
+            if roll < self.rate_limited:
+                outcome = "rate_limited"
+            elif roll < self.rate_limited + self.error_rate:
+                outcome = "error"
+            else:
+                outcome = "ok"
+            self.counts[outcome] += 1
+            return outcome
+
+    def delay(self):
+        """Latency of the next answer in seconds"""
+        with self.lock:
+            return self.latency + self.random.uniform(0, self.jitter)
+
+    def next_answer(self):
+        """Get the next synthetic answer"""
+        with self.lock:
+            self.served += 1
+            return self.answers[self.served % len(self.answers)]
+
+    def get_stats(self):
+        """Get the request counters"""
+        with self.lock:
+            return dict(self.counts)
+
+def start_server(host="127.0.0.1", port=0, **settings):
+    """Start a fake API server in a background thread
+
+    Args:
+        host (str, optional): Interface to listen on. Defaults to "127.0.0.1".
+        port (int, optional): Port; 0 picks a free port. Defaults to 0.
+        **settings: Options of FakePerplexityServer
+
+    Returns:
+        FakePerplexityServer: The running server; its base URL is
+            f"http://{host}:{server.server_port}"
+    """
+    server = FakePerplexityServer((host, port), **settings)
+    threading.Thread(target=server.serve_forever, name="fake-perplexity", daemon=True).start()
+    return server
+
+def add_server_arguments(parser):
+    """Add the fake server's settings to an argument parser"""
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds before each answer")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Maximum extra random latency")
+    parser.add_argument("--rate-limited", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--response-size", type=int, default=4096, help="Characters per answer")
+    parser.add_argument("--headings-per-kb", type=float, default=0.5, help="Section headings per KB")
+    parser.add_argument("--citations-per-kb", type=float, default=2.0, help="Citations per KB")
+    parser.add_argument("--stream-chunk", type=int, default=64, help="Characters per streamed event")
+
+def server_settings(args):
+    """Get the FakePerplexityServer options from parsed arguments"""
+    return {
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "rate_limited": args.rate_limited,
+        "retry_after": args.retry_after,
+        "error_rate": args.error_rate,
+        "response_size": args.response_size,
+        "headings_per_kb": args.headings_per_kb,
+        "citations_per_kb": args.citations_per_kb,
+        "stream_chunk": args.stream_chunk
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = FakePerplexityServer((args.host, args.port), **server_settings(args))
+    print(f"Fake Perplexity API listening on http://{args.host}:{server.server_port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
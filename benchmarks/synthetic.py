@@ -0,0 +1,74 @@
+import random
+
+WORDS = (
+    "research model data analysis results study system method approach network "
+    "performance energy climate policy market quantum protein cell learning training "
+    "benchmark dataset accuracy latency hardware software security privacy regulation "
+    "investment growth adoption deployment experiment evidence review survey trial "
+    "framework algorithm architecture efficiency scale impact development report"
+).split()
+
+def make_markdown(size, headings_per_kb=0.5, citations_per_kb=2.0, sources=50, seed=0):
+    """Build a synthetic research answer in the style of a Perplexity response
+
+    The text is made of paragraphs of random words with occasional *emphasis*,
+    split into sections by "## " headings and sprinkled with [Source N]
+    citations.
+
+    Args:
+        size (int): Approximate length of the text in characters
+        headings_per_kb (float, optional): Section headings per 1024 characters.
+            Defaults to 0.5.
+        citations_per_kb (float, optional): Citations per 1024 characters.
+            Defaults to 2.0.
+        sources (int, optional): Number of distinct cited sources. Defaults to 50.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        str: Markdown text
+    """
+    rng = random.Random(seed)
+    heading_every = 1024 / headings_per_kb if headings_per_kb > 0 else float("inf")
+    citation_every = 1024 / citations_per_kb if citations_per_kb > 0 else float("inf")
+
+    parts = []
+    length = 0
+    next_heading = 0
+    next_citation = citation_every
+    section = 0
+    while length < size:
+        if length >= next_heading:
+            section += 1
+            heading = f"## {rng.choice(WORDS).capitalize()} {rng.choice(WORDS)} {section}\n\n"
+            parts.append(heading)
+            length += len(heading)
+            next_heading += heading_every
+
+        words = [rng.choice(WORDS) for _ in range(rng.randint(8, 20))]
+        if rng.random() < 0.3:
+            index = rng.randrange(len(words))
+            words[index] = f"*{words[index]}*"
+        sentence = " ".join(words).capitalize()
+        if length >= next_citation:
+            sentence += f" [Source {rng.randint(1, sources)}]"
+            next_citation += citation_every
+        sentence += ".\n\n" if rng.random() < 0.2 else ". "
+
+        parts.append(sentence)
+        length += len(sentence)
+
+    return "".join(parts)[:size]
+
+def citations_in(text):
+    """List the distinct [Source N] citations of a synthetic answer in order of appearance"""
+    seen = []
+    start = text.find("[Source ")
+    while start != -1:
+        end = text.find("]", start)
+        if end == -1:
+            break
+        citation = text[start + 1:end]
+        if citation not in seen:
+            seen.append(citation)
+        start = text.find("[Source ", end)
+    return seen
@@ -24,18 +24,12 @@ function setupJournalEventListeners() {
 }
 
 /**
- * Fetch journal entries from API
+ * Fetch journal entries from API, following pagination cursors
  */
 function fetchJournalEntries() {
-    fetch(`${API_BASE_URL}/journal`)
-        .then(response => {
-            if (!response.ok) {
-                throw new Error(`HTTP error! Status: ${response.status}`);
-            }
-            return response.json();
-        })
-        .then(data => {
-            journalEntries = data;
+    fetchJournalPages(null, [])
+        .then(entries => {
+            journalEntries = entries;
             renderJournalEntries(journalEntries);
         })
         .catch(error => {
@@ -44,6 +38,31 @@ function fetchJournalEntries() {
         });
 }
 
+/**
+ * Fetch one page of journal entries and any pages after it
+ * @param {string|null} cursor - Cursor of the page to fetch
+ * @param {Array} entries - Entries fetched so far
+ * @returns {Promise<Array>} - All journal entries
+ */
+function fetchJournalPages(cursor, entries) {
+    const params = new URLSearchParams({ limit: 200 });
+    if (cursor) {
+        params.set('cursor', cursor);
+    }
+    
+    return fetch(`${API_BASE_URL}/journal?${params}`)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`HTTP error! Status: ${response.status}`);
+            }
+            const nextCursor = response.headers.get('X-Next-Cursor');
+            return response.json().then(data => {
+                const allEntries = entries.concat(data);
+                return nextCursor ? fetchJournalPages(nextCursor, allEntries) : allEntries;
+            });
+        });
+}
+
 /**
  * Render journal entries in the UI
  * @param {Array} entries - Journal entries to render
@@ -83,7 +102,7 @@ function renderJournalEntries(entries) {
                 </div>
                 <div class="journal-entry-footer">
                     <span class="journal-status ${statusClass}">${statusText}</span>
-                    <a href="/journal/${entry.filename}" class="view-link" target="_blank">
+                    <a href="/journal/${entry.filename}?v=${entry.content_hash || ''}" class="view-link" target="_blank">
                         View <i class="fas fa-external-link-alt"></i>
                     </a>
                 </div>
@@ -130,6 +149,18 @@ function filterJournalEntries(searchTerm) {
     renderJournalEntries(filteredEntries);
 }
 
+/**
+ * Add or replace a single journal entry, e.g. from a live update event
+ * @param {Object} entry - Journal entry as returned by the API
+ */
+function upsertJournalEntry(entry) {
+    // The newest entry goes first, as in the default sort order
+    journalEntries = [entry, ...journalEntries.filter(existing => existing.filename !== entry.filename)];
+    
+    const searchInput = document.getElementById('journal-search');
+    filterJournalEntries(searchInput ? searchInput.value.trim().toLowerCase() : '');
+}
+
 /**
  * Refresh journal entries (called after new entries are generated)
  */
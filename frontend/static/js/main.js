@@ -6,6 +6,11 @@ let globalStatus = {
     next_run_time: null,
     api_calls_this_month: 0
 };
+let recentActivity = [];
+
+// Completions within this many milliseconds share one status refresh
+const STATUS_REFRESH_DELAY = 1500;
+let statusRefreshTimer = null;
 
 // Initialize app when DOM is fully loaded
 document.addEventListener('DOMContentLoaded', function() {
@@ -13,10 +18,76 @@ document.addEventListener('DOMContentLoaded', function() {
     initializeModals();
     fetchAndUpdateStatus();
     
-    // Set up periodic refresh for status
-    setInterval(fetchAndUpdateStatus, 60000); // Refresh every minute
+    // Receive live updates instead of polling
+    subscribeToEvents();
 });
 
+/**
+ * Subscribe to the server's live event stream
+ */
+function subscribeToEvents() {
+    if (!window.EventSource) {
+        // Fall back to polling in browsers without Server-Sent Events
+        setInterval(fetchAndUpdateStatus, 60000);
+        return;
+    }
+    
+    const source = new EventSource(`${API_BASE_URL}/events`);
+    let connected = false;
+    
+    // Events may have been missed while disconnected, so resync on reconnect
+    source.addEventListener('open', () => {
+        if (connected) {
+            fetchAndUpdateStatus();
+        }
+        connected = true;
+    });
+    
+    source.addEventListener('log', (e) => {
+        const activity = JSON.parse(e.data);
+        recentActivity = [activity, ...recentActivity].slice(0, 10);
+        updateActivityList(recentActivity);
+    });
+    
+    source.addEventListener('next_run', (e) => {
+        const data = JSON.parse(e.data);
+        globalStatus.next_run_time = data.next_run_time;
+        updateStatusDisplay(globalStatus);
+    });
+    
+    source.addEventListener('topic_partial', (e) => {
+        updateTopicPreview(JSON.parse(e.data));
+    });
+    
+    source.addEventListener('topic_status', (e) => {
+        const data = JSON.parse(e.data);
+        updateTopicStatus(data);
+        
+        if (data.status === 'completed') {
+            // A finished run adds a journal entry and uses an API call
+            if (data.journal_entry) {
+                upsertJournalEntry(data.journal_entry);
+            } else {
+                refreshJournalEntries();
+            }
+            scheduleStatusRefresh();
+        }
+    });
+}
+
+/**
+ * Refresh the status once for a burst of events instead of once per event
+ */
+function scheduleStatusRefresh() {
+    if (statusRefreshTimer) {
+        return;
+    }
+    statusRefreshTimer = setTimeout(() => {
+        statusRefreshTimer = null;
+        fetchAndUpdateStatus();
+    }, STATUS_REFRESH_DELAY);
+}
+
 /**
  * Initialize modal functionality
  */
@@ -79,6 +150,7 @@ function fetchAndUpdateStatus() {
             updateStatusDisplay(data.status);
             updateActivityList(data.recent_activity);
             globalStatus = data.status;
+            recentActivity = data.recent_activity;
         })
         .catch(error => {
             console.error('Error fetching status:', error);
@@ -1,6 +1,7 @@
 // Global variables
 let topics = [];
 let editingTopicId = null;
+let topicPreviews = {};
 
 // Initialize topic management when DOM is loaded
 document.addEventListener('DOMContentLoaded', function() {
@@ -67,13 +68,7 @@ function setupTopicEventListeners() {
  * Fetch topics from the API
  */
 function fetchTopics() {
-    fetch(`${API_BASE_URL}/topics`)
-        .then(response => {
-            if (!response.ok) {
-                throw new Error(`HTTP error! Status: ${response.status}`);
-            }
-            return response.json();
-        })
+    fetchTopicPages(null, [])
         .then(data => {
             topics = data;
             renderTopicsList();
@@ -84,6 +79,36 @@ function fetchTopics() {
         });
 }
 
+/**
+ * Fetch one page of topics and any pages after it
+ * @param {string|null} cursor - Cursor of the page to fetch
+ * @param {Array} fetched - Topics fetched so far
+ * @returns {Promise<Array>} - All topics
+ */
+function fetchTopicPages(cursor, fetched) {
+    // Only the fields the topic list and edit dialog use
+    const params = new URLSearchParams({
+        limit: 500,
+        fields: 'id,name,query,status,frequency,cron,refresh_mode,last_updated'
+    });
+    if (cursor) {
+        params.set('cursor', cursor);
+    }
+    
+    // Unchanged pages are revalidated with their ETag and come from the browser cache
+    return fetch(`${API_BASE_URL}/topics?${params}`)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`HTTP error! Status: ${response.status}`);
+            }
+            const nextCursor = response.headers.get('X-Next-Cursor');
+            return response.json().then(data => {
+                const allTopics = fetched.concat(data);
+                return nextCursor ? fetchTopicPages(nextCursor, allTopics) : allTopics;
+            });
+        });
+}
+
 /**
  * Render the topics list in the UI
  */
@@ -99,12 +124,16 @@ function renderTopicsList() {
             const topicItem = document.createElement('div');
             topicItem.className = 'topic-item';
             
+            // Show a spinner while the topic is being researched
+            const processing = topic.status === 'processing';
+            const runIcon = processing ? 'fas fa-spinner fa-spin' : 'fas fa-play';
+            
             // Create topic HTML
             topicItem.innerHTML = `
                 <span class="topic-name">${topic.name}</span>
                 <div class="topic-actions">
-                    <button class="run-btn" title="Run now" data-id="${topic.id}">
-                        <i class="fas fa-play"></i>
+                    <button class="run-btn" title="Run now" data-id="${topic.id}" ${processing ? 'disabled' : ''}>
+                        <i class="${runIcon}"></i>
                     </button>
                     <button class="edit-btn" title="Edit" data-id="${topic.id}">
                         <i class="fas fa-edit"></i>
@@ -116,6 +145,15 @@ function renderTopicsList() {
             `;
             
             topicsList.appendChild(topicItem);
+            
+            // Partial answer streamed while the topic is processing
+            if (topicPreviews[topic.id]) {
+                const preview = document.createElement('div');
+                preview.className = 'topic-preview';
+                preview.setAttribute('data-id', topic.id);
+                preview.innerHTML = topicPreviews[topic.id];
+                topicsList.appendChild(preview);
+            }
         });
         
         // Add event listeners for action buttons
@@ -130,6 +168,39 @@ function renderTopicsList() {
     }
 }
 
+/**
+ * Apply a live topic status update
+ * @param {Object} data - Topic status event data
+ */
+function updateTopicStatus(data) {
+    const topic = topics.find(t => t.id == data.topic_id);
+    if (!topic) {
+        return;
+    }
+    
+    topic.status = data.status;
+    topic.last_updated = data.last_updated;
+    if (data.status !== 'processing') {
+        delete topicPreviews[topic.id];
+    }
+    renderTopicsList();
+}
+
+/**
+ * Show the partial answer of a topic that is being processed
+ * @param {Object} data - Partial content event data
+ */
+function updateTopicPreview(data) {
+    topicPreviews[data.topic_id] = data.html;
+    
+    const preview = document.querySelector(`.topic-preview[data-id="${data.topic_id}"]`);
+    if (preview) {
+        preview.innerHTML = data.html;
+    } else {
+        renderTopicsList();
+    }
+}
+
 /**
  * Add event listeners for topic action buttons
  */
@@ -183,10 +254,8 @@ function runTopicNow(topicId) {
             return response.json();
         })
         .then(data => {
+            // Progress arrives through the live event stream
             showSuccess(data.message);
-            
-            // Refresh status after a short delay
-            setTimeout(fetchAndUpdateStatus, 2000);
         })
         .catch(error => {
             console.error('Error running topic search:', error);
@@ -204,11 +273,16 @@ function showTopicModal(topicName = '') {
     const topicNameInput = document.getElementById('topic-name');
     const topicQueryInput = document.getElementById('topic-query');
     const topicIdInput = document.getElementById('topic-id');
+    const topicFrequencyInput = document.getElementById('topic-frequency');
+    const topicCronInput = document.getElementById('topic-cron');
     
     // Reset form
     topicNameInput.value = topicName;
     topicQueryInput.value = '';
     topicIdInput.value = '';
+    topicFrequencyInput.value = '';
+    topicCronInput.value = '';
+    document.getElementById('topic-delta').checked = false;
     
     // Set modal title for new topic
     modalTitle.textContent = 'Add Research Topic';
@@ -242,11 +316,16 @@ function editTopic(topicId) {
     const topicNameInput = document.getElementById('topic-name');
     const topicQueryInput = document.getElementById('topic-query');
     const topicIdInput = document.getElementById('topic-id');
+    const topicFrequencyInput = document.getElementById('topic-frequency');
+    const topicCronInput = document.getElementById('topic-cron');
     
     // Fill form with topic data
     topicNameInput.value = topic.name;
     topicQueryInput.value = topic.query;
     topicIdInput.value = topic.id;
+    topicFrequencyInput.value = topic.frequency || '';
+    topicCronInput.value = topic.cron || '';
+    document.getElementById('topic-delta').checked = topic.refresh_mode === 'delta';
     
     // Set modal title for editing
     modalTitle.textContent = 'Edit Research Topic';
@@ -263,10 +342,16 @@ function saveTopicFromForm() {
     const topicNameInput = document.getElementById('topic-name');
     const topicQueryInput = document.getElementById('topic-query');
     const topicIdInput = document.getElementById('topic-id');
+    const topicFrequencyInput = document.getElementById('topic-frequency');
+    const topicCronInput = document.getElementById('topic-cron');
     
+    // Empty schedule fields mean the topic follows the global schedule
     const topicData = {
         name: topicNameInput.value.trim(),
-        query: topicQueryInput.value.trim()
+        query: topicQueryInput.value.trim(),
+        frequency: topicFrequencyInput.value || null,
+        cron: topicCronInput.value.trim() || null,
+        refresh_mode: document.getElementById('topic-delta').checked ? 'delta' : 'full'
     };
     
     if (!topicData.name || !topicData.query) {
@@ -308,8 +393,9 @@ function createTopic(topicData) {
             const modal = document.getElementById('topic-modal');
             modal.classList.remove('active');
             
-            // Refresh topics list
-            fetchTopics();
+            // Add the created topic instead of reloading the list
+            topics.push(data);
+            renderTopicsList();
             
             showSuccess(`Topic "${topicData.name}" created successfully.`);
         })
@@ -343,8 +429,9 @@ function updateTopic(topicId, topicData) {
             const modal = document.getElementById('topic-modal');
             modal.classList.remove('active');
             
-            // Refresh topics list
-            fetchTopics();
+            // Replace the edited topic instead of reloading the list
+            topics = topics.map(topic => topic.id === data.id ? data : topic);
+            renderTopicsList();
             
             showSuccess(`Topic "${topicData.name}" updated successfully.`);
         })
@@ -369,8 +456,9 @@ function deleteTopic(topicId) {
             return response.json();
         })
         .then(data => {
-            // Refresh topics list
-            fetchTopics();
+            // Drop the deleted topic instead of reloading the list
+            topics = topics.filter(topic => topic.id != topicId);
+            renderTopicsList();
             
             showSuccess(data.message);
         })
@@ -0,0 +1,45 @@
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+import module_shim
+
+module_shim.install()
+
+class TestConfig:
+    """Settings read by utils, used when backend/config.py is absent"""
+    JOURNAL_DIR = os.path.join("frontend", "journal_html")
+    MAIL_SERVER = None
+    MAIL_PORT = 587
+    MAIL_USE_TLS = True
+    MAIL_USERNAME = None
+    MAIL_PASSWORD = None
+    MAIL_DEFAULT_SENDER = None
+
+try:
+    import config  # noqa: F401
+except ImportError:
+    sys.modules["config"] = types.SimpleNamespace(Config=TestConfig)
+
+from flask import Flask
+from models import db, Schedule, Status
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Application with a fresh database, working in a temporary directory"""
+    monkeypatch.chdir(tmp_path)
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'test.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add(Status(api_calls_this_month=0))
+        db.session.add(Schedule())
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
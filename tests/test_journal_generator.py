@@ -0,0 +1,23 @@
+import gzip
+
+from journal_generator import read_content_hash, render_markdown, render_markdown_sections
+
+def test_read_content_hash_of_binary_file_is_none(tmp_path):
+    filepath = tmp_path / "entry.html.gz"
+    filepath.write_bytes(gzip.compress(b"<html>" + bytes(range(256)) * 8))
+    assert read_content_hash(str(filepath)) is None
+
+def test_read_content_hash_from_meta_tag(tmp_path):
+    filepath = tmp_path / "entry.html"
+    filepath.write_text('<html><head><meta name="content-hash" content="ab12"></head></html>', encoding="utf-8")
+    assert read_content_hash(str(filepath)) == "ab12"
+
+REFERENCE_ACROSS_SECTIONS = "## A\n\nSee [paper][1].\n\n## B\n\n[1]: https://example.org"
+
+def test_render_markdown_resolves_references_across_sections():
+    assert '<a href="https://example.org">paper</a>' in render_markdown(REFERENCE_ACROSS_SECTIONS)
+
+def test_render_markdown_sections_resolves_references_across_sections():
+    html = render_markdown_sections(REFERENCE_ACROSS_SECTIONS)
+    assert '<a href="https://example.org">paper</a>' in html
+    assert "[paper][1]" not in html and "[1]:" not in html
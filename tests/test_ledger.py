@@ -0,0 +1,47 @@
+import time
+
+from ledger import UsageLedger
+
+def test_reader_sees_other_writers_increments(tmp_path):
+    path = str(tmp_path / "ledger.db")
+    writer = UsageLedger(path, flush_interval=0.05)
+    reader = UsageLedger(path, flush_interval=0.05)
+    assert reader.get("calls") == 0
+
+    writer.increment("calls", 3)
+    writer.flush()
+    time.sleep(0.1)
+
+    # The reader never increments, so it has no flush thread
+    assert reader.get("calls") == 3
+    writer.close()
+    reader.close()
+
+class ReadDuringCommit:
+    """Connection wrapper that reads the ledger just before each COMMIT"""
+
+    def __init__(self, conn, ledger):
+        self.conn = conn
+        self.ledger = ledger
+        self.seen = []
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+    def execute(self, sql, *args):
+        if sql == "COMMIT":
+            self.seen.append(self.ledger.get("calls"))
+        return self.conn.execute(sql, *args)
+
+def test_get_counts_increments_while_they_are_flushed(tmp_path):
+    ledger = UsageLedger(str(tmp_path / "ledger.db"), flush_interval=60)
+    ledger.increment("calls", 3)
+    conn = ledger._connection()
+    ledger._conn = ReadDuringCommit(conn, ledger)
+
+    ledger.flush()
+
+    assert ledger._conn.seen == [3]
+    assert ledger.get("calls") == 3
+    ledger._conn = conn
+    ledger.close()
@@ -0,0 +1,57 @@
+from flask import Flask
+from sqlalchemy import inspect, text
+
+import models
+from models import db, JournalStat, Topic, upgrade_schema
+
+# The topic table as created before the later columns were added
+OLD_TOPIC_TABLE = """
+CREATE TABLE topic (
+    id INTEGER PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    query TEXT NOT NULL,
+    tags VARCHAR(255),
+    created_at DATETIME,
+    last_updated DATETIME,
+    status VARCHAR(50)
+)
+"""
+
+def test_upgrade_schema_adds_missing_columns(tmp_path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'old.db'}"
+    db.init_app(app)
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.execute(text(OLD_TOPIC_TABLE))
+            connection.execute(text("INSERT INTO topic (name, query, status) VALUES ('Old', 'Old query', 'completed')"))
+
+        db.create_all()
+        added = upgrade_schema(db.engine)
+        assert {"topic.modified_at", "topic.cost_total", "topic.cost_runs", "topic.frequency",
+                "topic.cron", "topic.refresh_mode"} <= set(added)
+
+        topic = db.session.query(Topic).one()
+        assert (topic.name, topic.status) == ("Old", "completed")
+        assert (topic.cost_total, topic.cost_runs, topic.refresh_mode) == (0.0, 0, "full")
+        assert topic.modified_at is None
+        assert "ix_topic_modified_at" in {index["name"] for index in inspect(db.engine).get_indexes("topic")}
+
+        # Nothing left to do on the next start
+        assert upgrade_schema(db.engine) == []
+        db.session.remove()
+        db.engine.dispose()
+
+def test_journal_stat_adjust_without_upsert_support(app, monkeypatch):
+    with app.app_context():
+        JournalStat.adjust("tag", "fusion", 2)
+        db.session.commit()
+
+        # As on a database with no ON CONFLICT construct
+        monkeypatch.setattr(models, "UPSERT_INSERTS", {})
+        JournalStat.adjust("tag", "fusion", 1)
+        JournalStat.adjust("tag", "solar", 1)
+        db.session.commit()
+
+        counts = {stat.key: stat.count for stat in db.session.query(JournalStat)}
+        assert counts == {"fusion": 3, "solar": 1}
@@ -0,0 +1,55 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from perplexity_api import PerplexityAPIManager
+from response_cache import ResponseCache
+
+class AnswerHandler(BaseHTTPRequestHandler):
+    """Answers every chat completion with a new numbered answer"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with self.server.lock:
+            self.server.requests += 1
+            content = f"## Answer {self.server.requests}"
+        body = json.dumps({
+            "choices": [{"message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 10}
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), AnswerHandler)
+    server.requests = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def test_refresh_bypasses_and_replaces_cached_answer(server, tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"))
+    manager = PerplexityAPIManager("test", daily_budget=100, cache=cache,
+                                   base_url=f"http://127.0.0.1:{server.server_port}")
+
+    first = manager.query("Latest fusion results")
+    assert manager.query("Latest fusion results")["cached"]
+    assert server.requests == 1
+
+    # A scheduled update asks again and stores the new answer
+    fresh = manager.query("Latest fusion results", refresh=True)
+    assert not fresh["cached"]
+    assert server.requests == 2
+    assert fresh["content"] != first["content"]
+    assert manager.query("Latest fusion results")["content"] == fresh["content"]
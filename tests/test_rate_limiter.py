@@ -0,0 +1,40 @@
+import asyncio
+import threading
+import time
+
+from rate_limiter import TokenBucket
+
+def test_acquire_honours_retry_after_received_while_waiting():
+    bucket = TokenBucket(rate=10, capacity=1, jitter=0)
+    bucket.acquire()
+    waited = []
+    waiter = threading.Thread(target=lambda: waited.append(bucket.acquire()))
+    waiter.start()
+
+    # The waiter needs 0.1s for its token; a 429 arrives while it sleeps
+    time.sleep(0.05)
+    bucket.penalize(retry_after=0.5)
+    waiter.join(timeout=5)
+
+    assert waited and waited[0] >= 0.5
+
+def test_acquire_async_honours_retry_after_received_while_waiting():
+    bucket = TokenBucket(rate=10, capacity=1, jitter=0)
+    bucket.acquire()
+
+    async def main():
+        waiter = asyncio.ensure_future(bucket.acquire_async())
+        await asyncio.sleep(0.05)
+        bucket.penalize(retry_after=0.5)
+        return await waiter
+
+    assert asyncio.run(main()) >= 0.5
+
+def test_retry_after_trims_the_rate_instead_of_halving_it():
+    bucket = TokenBucket(rate=10, capacity=1, jitter=0)
+
+    bucket.penalize(retry_after=0)
+    assert bucket.rate == 9
+
+    bucket.penalize()
+    assert bucket.rate == 4.5
@@ -0,0 +1,203 @@
+import threading
+import time
+from datetime import datetime
+
+from metrics import REGISTRY
+from models import db, Topic, Run, JournalEntry
+from scheduler import SchedulerManager
+
+class FakeAPI:
+    """Stands in for PerplexityAPIManager with a fixed latency"""
+
+    def __init__(self, latency=0.0, budget=float("inf"), cost=0.0):
+        self.latency = latency
+        self.budget = budget
+        self.cost = cost
+        self.queries = []
+        self.refreshes = []
+        self.max_tokens = []
+        self.lock = threading.Lock()
+
+    def remaining_budget(self):
+        return self.budget
+
+    def estimate_cost(self, query, system_message=None, max_tokens=None):
+        return self.cost
+
+    def query(self, query, system_message=None, max_tokens=None, on_chunk=None, refresh=False):
+        time.sleep(self.latency)
+        with self.lock:
+            self.queries.append(query)
+            self.refreshes.append(refresh)
+            self.max_tokens.append(max_tokens)
+        return {"content": "## Findings\n\nNothing new.", "citations": []}
+
+def fake_journal_generator(topic, api_response, previous=None):
+    return f"topic-{topic.id}.html"
+
+def add_topics(app, count, **fields):
+    with app.app_context():
+        topics = [Topic(name=f"Topic {index}", query=f"Query {index}", **fields) for index in range(count)]
+        db.session.add_all(topics)
+        db.session.commit()
+        return [topic.id for topic in topics]
+
+def wait_for_queries(api, count, timeout=30):
+    deadline = time.monotonic() + timeout
+    while len(api.queries) < count and time.monotonic() < deadline:
+        time.sleep(0.1)
+
+def wait_for_runs(app, count, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with app.app_context():
+            if db.session.query(Run).count() >= count:
+                return
+        time.sleep(0.1)
+    raise AssertionError(f"Fewer than {count} runs recorded after {timeout}s")
+
+def test_topics_due_together_all_run(app):
+    # More topics than APScheduler's default of 10 executor threads, each
+    # taking longer than its default misfire grace time of one second
+    add_topics(app, 15, cron="* * * * *")
+    api = FakeAPI(latency=1.5)
+    manager = SchedulerManager(api, fake_journal_generator, max_workers=8, spread_window=0,
+                               stream_responses=False)
+    manager.start_scheduler(app)
+    try:
+        # Fire now instead of at the start of the next minute
+        jobs = manager.batch_jobs()
+        now = datetime.now(manager.scheduler.timezone)
+        for job in jobs:
+            job.modify(next_run_time=now)
+        wait_for_queries(api, 15, timeout=10)
+        wait_for_runs(app, 1)
+    finally:
+        manager.scheduler.shutdown()
+
+    assert sorted(api.queries) == sorted(f"Query {index}" for index in range(15))
+    # Scheduled updates never reuse cached answers
+    assert all(api.refreshes)
+    assert len(jobs) == 1
+    with app.app_context():
+        assert db.session.query(Topic).filter(Topic.status == "completed").count() == 15
+        runs = db.session.query(Run).all()
+        assert [(run.trigger, run.topic_count, run.error_count) for run in runs] == [("scheduled", 15, 0)]
+
+def test_topics_move_between_batches(app):
+    topic_ids = add_topics(app, 3)
+    manager = SchedulerManager(FakeAPI(), fake_journal_generator, spread_window=0)
+    manager.start_scheduler(app)
+    try:
+        assert [job.kwargs["topic_ids"] for job in manager.batch_jobs()] == [topic_ids]
+
+        with app.app_context():
+            topic = db.session.get(Topic, topic_ids[0])
+            topic.cron = "30 6 * * *"
+            db.session.commit()
+            manager.schedule_topic(app, topic)
+        batches = sorted(job.kwargs["topic_ids"] for job in manager.batch_jobs())
+        assert batches == [[topic_ids[0]], topic_ids[1:]]
+
+        with app.app_context():
+            manager.unschedule_topic(topic_ids[0])
+        assert [job.kwargs["topic_ids"] for job in manager.batch_jobs()] == [topic_ids[1:]]
+    finally:
+        manager.scheduler.shutdown()
+
+def test_oversized_delta_entry_gets_full_refresh(app):
+    topic_ids = add_topics(app, 2, refresh_mode="delta", last_updated=datetime(2024, 1, 1))
+    with app.app_context():
+        for topic_id, size in zip(topic_ids, (1000, 5000)):
+            topic = db.session.get(Topic, topic_id)
+            db.session.add(JournalEntry(topic_id=topic_id, topic_name=topic.name,
+                                        filename=f"{topic.name.lower().replace(' ', '-')}.html",
+                                        markdown="## Findings\n\n" + "x" * size))
+        db.session.commit()
+
+    api = FakeAPI()
+    manager = SchedulerManager(api, fake_journal_generator, max_workers=1, delta_max_bytes=4096,
+                               stream_responses=False)
+    manager.run_scheduled_update(app)
+
+    assert api.max_tokens == [manager.delta_max_tokens, manager.topic_max_tokens]
+
+class RecordingBus:
+    def __init__(self):
+        self.events = []
+
+    def publish(self, event_type, data):
+        self.events.append((event_type, data))
+
+def test_completed_status_carries_the_journal_entry(app):
+    add_topics(app, 1)
+
+    def generate(topic, api_response, previous=None):
+        db.session.add(JournalEntry(topic_id=topic.id, topic_name=topic.name, filename="topic-0.html",
+                                    content_hash="ab12"))
+        return "topic-0.html"
+
+    bus = RecordingBus()
+    manager = SchedulerManager(FakeAPI(), generate, event_bus=bus, stream_responses=False)
+    manager.run_scheduled_update(app)
+
+    statuses = [data for event_type, data in bus.events if event_type == "topic_status"]
+    assert [data["status"] for data in statuses] == ["processing", "completed"]
+    assert "journal_entry" not in statuses[0]
+    entry = statuses[1]["journal_entry"]
+    assert (entry["filename"], entry["topic_name"], entry["content_hash"]) == ("topic-0.html", "Topic 0", "ab12")
+
+def test_sync_schedules_topics_added_outside_the_manager(app):
+    topic_ids = add_topics(app, 2)
+    manager = SchedulerManager(FakeAPI(), fake_journal_generator, spread_window=0)
+    manager.start_scheduler(app)
+    try:
+        assert manager.scheduler.get_job(manager.sync_job_id) is not None
+
+        # As with flask import-topics: committed without telling the scheduler
+        with app.app_context():
+            db.session.add(Topic(name="Imported", query="Imported query"))
+            db.session.delete(db.session.get(Topic, topic_ids[0]))
+            db.session.commit()
+            imported = db.session.query(Topic).filter_by(name="Imported").one().id
+
+        manager.sync_topics(app)
+        assert [job.kwargs["topic_ids"] for job in manager.batch_jobs()] == [[topic_ids[1], imported]]
+    finally:
+        manager.scheduler.shutdown()
+
+def test_overlapping_batches_share_the_remaining_budget(app):
+    first = add_topics(app, 2)
+    second = add_topics(app, 2)
+    # Room for two topics; spending is not recorded until a topic finishes
+    api = FakeAPI(latency=0.5, budget=1.0, cost=0.4)
+    manager = SchedulerManager(api, fake_journal_generator, max_workers=4)
+
+    batches = [
+        threading.Thread(target=manager.run_scheduled_update, args=(app, topic_ids))
+        for topic_ids in (first, second)
+    ]
+    for batch in batches:
+        batch.start()
+    for batch in batches:
+        batch.join(timeout=30)
+
+    assert len(api.queries) == 2
+    assert manager.reserved_budget == 0.0
+    manager.topic_executor.shutdown()
+
+def test_metrics_report_scheduled_topics_waiting_for_a_worker(app):
+    topic_ids = add_topics(app, 3)
+    api = FakeAPI(latency=0.5)
+    manager = SchedulerManager(api, fake_journal_generator, max_workers=1)
+
+    batch = threading.Thread(target=manager.run_scheduled_update, args=(app, topic_ids))
+    batch.start()
+    deadline = time.monotonic() + 5
+    while "scheduled_topic_queue_depth 2\n" not in REGISTRY.render() and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    assert "scheduled_topic_queue_depth 2\n" in REGISTRY.render()
+    batch.join(timeout=30)
+    assert "scheduled_topic_queue_depth 0\n" in REGISTRY.render()
+    manager.topic_executor.shutdown()
@@ -0,0 +1,55 @@
+import pytest
+
+from models import db, Topic
+from utils import decode_cursor, encode_cursor, export_topics, import_topics, parse_topic_document
+
+def test_import_reports_rows_with_wrong_types(app):
+    rows = [
+        {"name": ["x"], "query": "List name"},
+        {"name": "Cron number", "query": "q", "cron": 5},
+        {"name": "Frequency list", "query": "q", "frequency": ["daily"]},
+        {"id": "1", "name": "String id", "query": "q"},
+        {"name": "Valid", "query": "Valid query"}
+    ]
+    with app.app_context():
+        results = import_topics(rows)
+        assert [result["status"] for result in results] == ["error"] * 4 + ["created"]
+        assert results[0]["error"] == "Invalid topic name: must be a string"
+        assert results[1]["error"] == "Invalid cron: must be a string"
+        assert [topic.name for topic in db.session.query(Topic)] == ["Valid"]
+
+def test_export_imports_into_empty_database(app, tmp_path):
+    with app.app_context():
+        import_topics([
+            {"name": "Solar cells", "query": "Perovskite efficiency", "frequency": "weekly"},
+            {"name": "Fusion", "query": "Tokamak results", "cron": "0 6 * * 1", "refresh_mode": "delta"}
+        ])
+        # IDs that do not exist in the target database
+        db.session.query(Topic).update({Topic.id: Topic.id + 100})
+        db.session.commit()
+        document = "".join(export_topics())
+        exported = [topic.to_dict() for topic in db.session.query(Topic).order_by(Topic.id)]
+
+        db.session.query(Topic).delete()
+        db.session.commit()
+        results = import_topics(parse_topic_document(document))
+        assert [result["status"] for result in results] == ["created", "created"]
+
+        # Importing again updates the same topics
+        results = import_topics(parse_topic_document(document))
+        assert [result["status"] for result in results] == ["updated", "updated"]
+
+        fields = ("name", "query", "frequency", "cron", "refresh_mode")
+        imported = [topic.to_dict() for topic in db.session.query(Topic).order_by(Topic.id)]
+        assert [{field: topic[field] for field in fields} for topic in imported] == \
+            [{field: topic[field] for field in fields} for topic in exported]
+
+def test_decode_cursor_rejects_values_of_the_wrong_type():
+    assert decode_cursor(encode_cursor([7])) == [7]
+    assert decode_cursor(encode_cursor(["2024-01-01T00:00:00", 7]), types=(str, int)) == ["2024-01-01T00:00:00", 7]
+
+    for values in (["a"], [True], [1.5], [None], [1, 2], {"id": 1}):
+        with pytest.raises(ValueError):
+            decode_cursor(encode_cursor(values))
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor([7, "2024-01-01T00:00:00"]), types=(str, int))